@@ -2,12 +2,18 @@ import streamlit as st
 import pandas as pd
 import time
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from streamlit_autorefresh import st_autorefresh
 
-from data_fetcher import get_ohlc
-from rsi_engine import compute_rsi, rsi_bucket
-from config import MAX_WORKERS, MIN_CANDLES
+from engine.scanner import latest_results
+from engine.metrics import METRICS, summary_frame
+from engine.ranking import BucketRanking, update_rankings
+from engine.filter_sets import (
+    FilterSets, load_filter_sets, save_filter_sets, to_rows, from_rows,
+    COLUMNS as FILTER_COLUMNS, OPS as FILTER_OPS
+)
+from engine.symbols import price_bands
+from rsi_engine import rsi_buckets, RSI_BUCKET_ORDER
+from config import SNAPSHOT_MAX_AGE, LTP_PREFILTER_TOLERANCE
 
 # =================================================
 # PAGE + MOBILE CSS
@@ -32,18 +38,43 @@ st.title("📊 LIVE RSI DASHBOARD")
 # =================================================
 # SIDEBAR – FILTERS & REFRESH
 # =================================================
-st.sidebar.header("🔹 Filter Set 1 (Left)")
+st.sidebar.header("🔹 Filter Sets")
+st.sidebar.caption(
+    "One rule per row; rows with the same Set name are ANDed. "
+    "Ops: >= <= > < == != in, not in (comma-separated values)."
+)
 
-fs1_price_min = st.sidebar.number_input("Set 1 Min Price", 1, 100000, 100)
-fs1_price_max = st.sidebar.number_input("Set 1 Max Price", 1, 100000, 500)
-fs1_vol = st.sidebar.number_input("Set 1 Min Volume", 0, 10_000_000, 10_000, step=5_000)
+# Saved sets seed the editor once per session; edits apply live
+if "filter_rows" not in st.session_state:
+    st.session_state["filter_rows"] = pd.DataFrame(
+        to_rows(load_filter_sets()), columns=["Set", "Column", "Op", "Value"]
+    )
+
+rules = st.sidebar.data_editor(
+    st.session_state["filter_rows"],
+    num_rows="dynamic",
+    hide_index=True,
+    key="filter_rules",
+    column_config={
+        "Column": st.column_config.SelectboxColumn(options=list(FILTER_COLUMNS)),
+        "Op": st.column_config.SelectboxColumn(options=list(FILTER_OPS)),
+        "Value": st.column_config.TextColumn(),
+    },
+)
 
-st.sidebar.markdown("---")
-st.sidebar.header("🔸 Filter Set 2 (Right)")
+try:
+    filter_sets = FilterSets(from_rows(rules.to_dict("records")))
+except (ValueError, TypeError) as e:
+    st.sidebar.error(f"Invalid filter rule: {e}")
+    st.stop()
+
+if not filter_sets.names:
+    st.sidebar.error("Define at least one filter set.")
+    st.stop()
 
-fs2_price_min = st.sidebar.number_input("Set 2 Min Price", 1, 100000, 500)
-fs2_price_max = st.sidebar.number_input("Set 2 Max Price", 1, 100000, 2000)
-fs2_vol = st.sidebar.number_input("Set 2 Min Volume", 0, 10_000_000, 50_000, step=10_000)
+if st.sidebar.button("💾 Save Filter Sets"):
+    save_filter_sets(filter_sets.specs())
+    st.sidebar.success(f"Saved {len(filter_sets.names)} filter sets.")
 
 st.sidebar.markdown("---")
 
@@ -59,6 +90,9 @@ refresh_seconds = st.sidebar.number_input(
 
 manual_refresh = st.sidebar.button("🔄 Manual Refresh")
 if manual_refresh:
+    # Re-read the latest snapshot now (a running scanner keeps it fresh;
+    # without one, latest_results rescans once it goes stale)
+    st.session_state["reload_scan"] = True
     st.rerun()
 
 clear_cache = st.sidebar.button("🧹 Clear Cache")
@@ -77,29 +111,6 @@ st_autorefresh(
     key="auto_refresh_dynamic"
 )
 
-# =================================================
-# NIFTY DIRECTION
-# =================================================
-NIFTY_SECURITY_ID = "26000"  # verify once
-nifty_df = get_ohlc(NIFTY_SECURITY_ID, interval=5)
-nifty_direction = "NA"
-
-if not nifty_df.empty and len(nifty_df) >= 20:
-    nifty_rsi = compute_rsi(nifty_df["close"]).iloc[-1]
-    if nifty_rsi > 55:
-        nifty_direction = "🟢 Bullish"
-    elif nifty_rsi < 45:
-        nifty_direction = "🔴 Bearish"
-    else:
-        nifty_direction = "🟡 Neutral"
-
-st.subheader(f"📈 NIFTY Direction: {nifty_direction}")
-
-# =================================================
-# LOAD STOCK MASTER
-# =================================================
-stocks = pd.read_csv("stocks.csv").head(300)
-
 # =================================================
 # RSI LOGIC
 # =================================================
@@ -115,77 +126,121 @@ def detect_rsi_cross(prev, now):
     return "—"
 
 def process_stock(row):
-    df = get_ohlc(row["security_id"], interval=5)
-    if df.empty or len(df) < MIN_CANDLES:
-        return None
-
-    df = df.tail(30)
-    rsi_series = compute_rsi(df["close"])
-
     return {
-        "Company": row["NAME OF COMPANY"],
-        "Price": float(row["LTP"]),
-        "RSI": round(float(rsi_series.iloc[-1]), 2),
-        "Volume": int(df["volume"].iloc[-1]),
+        "security_id": str(row["security_id"]),
+        "Company": row["company"],
+        "Price": float(row["close"]),
+        "RSI": round(float(row["rsi"]), 2),
+        "Volume": int(row["volume"]),
+        "ADX": float(row["adx"]),
+        "VWAP Dist %": round((float(row["close"]) / float(row["vwap"]) - 1) * 100, 2)
+                       if row["vwap"] else float("nan"),
+        "Volume Spike": bool(row["volume_spike"]),
         "RSI Signal": detect_rsi_cross(
-            float(rsi_series.iloc[-2]),
-            float(rsi_series.iloc[-1])
-        ),
-        "Bucket": rsi_bucket(float(rsi_series.iloc[-1]))
+            float(row["rsi_prev"]),
+            float(row["rsi"])
+        )
     }
 
 # =================================================
-# EXECUTION (SINGLE SCAN)
+# LATEST SCAN (published by `python -m engine.scanner`)
+# st.cache_data is shared by every session, so the key is global: the
+# wall-clock refresh window plus the price bands. Sessions on the same
+# window share one load; sidebar filter / Top-N changes rerun the script
+# but hit this cache instead of reloading or rescanning.
 # =================================================
-start = time.time()
-results = []
+@st.cache_data(ttl=refresh_seconds, max_entries=8, show_spinner="Loading latest scan...")
+def load_scan(window, bands):
+    scan, meta = latest_results(max_age=SNAPSHOT_MAX_AGE, price_bands=bands)
+    with METRICS.timer("bucket"):
+        table = pd.DataFrame([process_stock(row) for row in scan.to_dict("records")])
+        if not table.empty:
+            # Whole column at once; thresholds from config.RSI_BUCKETS
+            table["Bucket"] = rsi_buckets(scan["rsi"])
+            table = table.set_index("security_id")
+    return table, meta
+
+# Only fetch symbols that can land in some filter set's price range
+# (a set without a Price ceiling needs the whole universe)
+price_ranges = filter_sets.price_ranges()
+scan_bands = None if price_ranges is None else price_bands(price_ranges, LTP_PREFILTER_TOLERANCE)
+
+if st.session_state.pop("reload_scan", False):
+    load_scan.clear()
+
+df, meta = load_scan(int(time.time() // refresh_seconds), scan_bands)
 
-progress = st.progress(0)
-total = len(stocks)
+# =================================================
+# NIFTY DIRECTION
+# =================================================
+nifty_rsi = meta.get("nifty_rsi")
+nifty_direction = "NA"
 
-with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-    futures = [executor.submit(process_stock, row) for _, row in stocks.iterrows()]
-    for i, f in enumerate(as_completed(futures)):
-        r = f.result()
-        if r:
-            results.append(r)
-        progress.progress((i + 1) / total)
+if nifty_rsi is not None:
+    if nifty_rsi > 55:
+        nifty_direction = "🟢 Bullish"
+    elif nifty_rsi < 45:
+        nifty_direction = "🔴 Bearish"
+    else:
+        nifty_direction = "🟡 Neutral"
+
+st.subheader(f"📈 NIFTY Direction: {nifty_direction}")
 
-elapsed = round(time.time() - start, 2)
-df = pd.DataFrame(results)
+scanned_at = datetime.fromtimestamp(meta.get("scanned_at", time.time()))
 
 # =================================================
 # HEADER METRICS
 # =================================================
 c1, c2, c3, c4 = st.columns(4)
 with c1:
-    st.metric("⏱ Last Refresh", datetime.now().strftime("%H:%M:%S"))
+    st.metric("⏱ Last Scan", scanned_at.strftime("%H:%M:%S"))
 with c2:
     st.metric("🔁 Next Refresh",
               (datetime.now() + timedelta(seconds=refresh_seconds)).strftime("%H:%M:%S"))
 with c3:
-    st.metric("⚡ Refresh Time (sec)", elapsed)
+    st.metric("⚡ Scan Time (sec)", meta.get("elapsed", 0))
 with c4:
-    st.metric("📊 Stocks Scanned", len(stocks))
+    st.metric("📊 Stocks Scanned", meta.get("symbols", 0))
+
+if meta.get("failed"):
+    st.warning(
+        f"⚠️ {len(meta['failed'])} symbols could not be refreshed "
+        f"(rate-limited or API errors) – showing their last cached candles."
+    )
 
 if df.empty:
     st.warning("No valid data returned.")
     st.stop()
 
+render_start = time.perf_counter()
+
 # =================================================
-# APPLY FILTER SETS
+# FILTER SETS – per-bucket rankings kept across refreshes
+# All sets are masked together (engine/filter_sets.py). Each session
+# keeps one BucketRanking per set; a refresh re-ranks only the symbols
+# whose price / RSI / volume / bucket changed, and editing a set's rules
+# starts a fresh ranking.
 # =================================================
-df_set1 = df[
-    (df["Price"] >= fs1_price_min) &
-    (df["Price"] <= fs1_price_max) &
-    (df["Volume"] >= fs1_vol)
-]
-
-df_set2 = df[
-    (df["Price"] >= fs2_price_min) &
-    (df["Price"] <= fs2_price_max) &
-    (df["Volume"] >= fs2_vol)
-]
+RANK_COLUMNS = ["Price", "RSI", "Volume", "ADX", "VWAP Dist %", "Volume Spike",
+                "RSI Signal", "Bucket"]
+
+def ranking_for(name):
+    # Only the visible top_n rows per bucket are ranked (argpartition)
+    params = (filter_sets.signature(name), top_n)
+    saved = st.session_state.get(f"ranking_{name}")
+    if saved is None or saved[0] != params:
+        saved = st.session_state[f"ranking_{name}"] = (
+            params, BucketRanking(filter_sets.mask_fn(name), n=top_n)
+        )
+    # Rules unchanged but the set object is new on every run
+    saved[1].mask_fn = filter_sets.mask_fn(name)
+    return saved[1]
+
+rankings = {name: ranking_for(name) for name in filter_sets.names}
+for key in [k for k in st.session_state if str(k).startswith("ranking_")]:
+    if key[len("ranking_"):] not in rankings:
+        del st.session_state[key]
+update_rankings(list(rankings.values()), df, RANK_COLUMNS)
 
 # =================================================
 # COLOR STYLING
@@ -209,44 +264,46 @@ def style_bucket(row):
         styles.append(cell)
     return styles
 
-bucket_order = [
-    "Extreme Bought", "Overbought", "Bullish",
-    "Bearish", "Oversold", "Extreme Sold"
-]
+bucket_order = RSI_BUCKET_ORDER
 
 # =================================================
 # RENDER SECTIONS (AUTO-COLLAPSE EMPTY)
 # =================================================
-def render_section(container, title, df_view):
+def display_frame(bucket_df):
+    display_df = bucket_df[[
+        "Company", "Price", "RSI", "Volume", "RSI Signal"
+    ]].copy()
+
+    # 🔢 ROUND VALUES (nullable ints: RSI is NaN for flat-price symbols)
+    display_df["Price"] = display_df["Price"].round(0).astype("Int64")
+    display_df["RSI"] = display_df["RSI"].round(0).astype("Int64")
+    display_df["Volume"] = display_df["Volume"].round(0).astype("Int64")
+    return display_df
+
+def render_section(container, title, ranking):
+    # Display frames of buckets whose top-N did not change are reused as-is
+    shown = st.session_state.setdefault(f"shown_{title}", {})
+
     with container:
         st.subheader(title)
 
         for bucket in bucket_order:
-            bucket_df = (
-                df_view[df_view["Bucket"] == bucket]
-                .sort_values("Volume", ascending=False)
-                .head(top_n)
-            )
+            ids = tuple(ranking.top(bucket, top_n))
 
             # Auto-collapse empty buckets
-            if bucket_df.empty:
+            if not ids:
+                shown.pop(bucket, None)
                 continue
 
+            cached = shown.get(bucket)
+            if cached is None or cached[0] != ids or bucket in ranking.dirty:
+                cached = shown[bucket] = (ids, display_frame(ranking.table.loc[list(ids)]))
+
             # Bucket header (acts as color context)
             st.markdown(f"### {bucket}")
 
-            # FINAL DISPLAY DATAFRAME
-            display_df = bucket_df[[
-                "Company", "Price", "RSI", "Volume", "RSI Signal"
-            ]].copy()
-
-            # 🔢 ROUND VALUES
-            display_df["Price"] = display_df["Price"].round(0).astype(int)
-            display_df["RSI"] = display_df["RSI"].round(0).astype(int)
-            display_df["Volume"] = display_df["Volume"].round(0).astype(int)
-
             st.dataframe(
-                display_df,
+                cached[1],
                 use_container_width=True,
                 hide_index=True
             )
@@ -254,8 +311,41 @@ def render_section(container, title, df_view):
 # =================================================
 # SIDE-BY-SIDE DISPLAY
 # =================================================
-left, right = st.columns(2)
-render_section(left, "🔹 Filter Set 1 Results", df_set1)
-render_section(right, "🔸 Filter Set 2 Results", df_set2)
+# Up to three sets per row
+names = filter_sets.names
+for start in range(0, len(names), 3):
+    row = names[start:start + 3]
+    for container, name in zip(st.columns(len(row)), row):
+        render_section(container, f"🔹 {name}", rankings[name])
+METRICS.observe("render", time.perf_counter() - render_start)
 
-st.caption("RSI-only scanner • Dual dynamic filters • Color-coded buckets • Dhan API")
+# =================================================
+# ALERTS (fired by the scanner, engine/alerts.py)
+# =================================================
+alerts = meta.get("alerts") or []
+with st.expander(f"🔔 Recent Alerts ({len(alerts)})", expanded=False):
+    if alerts:
+        st.dataframe(
+            pd.DataFrame([{
+                "Time": datetime.fromtimestamp(a["at"]).strftime("%H:%M:%S"),
+                "Company": a["company"] or a["symbol"],
+                "Alert": a["message"],
+                "Price": a["price"],
+            } for a in reversed(alerts)]),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.caption("No alerts yet.")
+
+# =================================================
+# DIAGNOSTICS (scanner stages from the snapshot + this page's own)
+# =================================================
+with st.expander("🩺 Diagnostics – stage latency", expanded=False):
+    st.dataframe(
+        summary_frame(meta.get("metrics"), METRICS.summary()),
+        use_container_width=True,
+        hide_index=True
+    )
+
+st.caption("RSI-only scanner • User-defined filter sets • Color-coded buckets • Dhan API")
@@ -0,0 +1,307 @@
+"""
+End-to-end scan benchmark, stage by stage, on replayed Dhan fixtures.
+
+    python -m benchmarks.bench_scan                       # 300, 2000, 10000 symbols
+    python -m benchmarks.bench_scan --sizes 300 --latency 0.05
+    python -m benchmarks.bench_scan --save base.json      # record a baseline
+    python -m benchmarks.bench_scan --compare base.json   # flag regressions
+
+Fetch stages hit the local Dhan stand-in (engine/mock_dhan.py) with the
+request budget lifted, and write to a throwaway candle store, so neither
+the Dhan quota nor the real cache is touched. Without recorded fixtures
+in benchmarks/data/ a synthetic set is generated.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import engine.async_fetcher as async_fetcher
+import engine.data_fetcher as data_fetcher
+from config import MAX_WORKERS, MIN_CANDLES
+from engine.candle_store import STORE, frame_from_response
+from engine.filter_sets import FilterSets, DEFAULT_SETS
+from engine.incremental import IndicatorStates
+from engine.indicators import (
+    compute_ema, compute_rsi, compute_vwap, compute_macd,
+    compute_adx, compute_supertrend, volume_spike, njit
+)
+from engine.market_buckets import assign_buckets
+from engine.panel import build_panel, compute_panel
+from engine.rate_limiter import LIMITER
+from engine.ranking import BucketRanking, update_rankings
+from rsi_engine import rsi_buckets, RSI_BUCKET_ORDER
+from engine.mock_dhan import MockServer
+from benchmarks.fixtures import FIXTURE_DIR, load_fixtures, redate, synthesize
+
+# app.py: fields whose change re-ranks a row
+RANK_COLUMNS = ["Price", "RSI", "Volume", "ADX", "VWAP Dist %", "Volume Spike",
+                "RSI Signal", "Bucket"]
+
+
+def timed(fn, repeat=1):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+# =========================================================
+# FETCH (stub server, throwaway candle store)
+# =========================================================
+def point_fetchers_at(url):
+    data_fetcher.URL = async_fetcher.URL = url
+    # Local mock has no quota: only the fetch path itself is measured
+    LIMITER.rate = LIMITER.capacity = LIMITER.tokens = 1e9
+
+
+def fresh_store():
+    STORE.root = tempfile.mkdtemp(prefix="bench_store_")
+
+
+def fetch_threaded(ids):
+    with ThreadPoolExecutor(MAX_WORKERS) as exe:
+        return dict(zip(ids, exe.map(data_fetcher.get_ohlc, ids)))
+
+
+def fetch_async(ids):
+    return async_fetcher.fetch_many(ids)
+
+
+# =========================================================
+# DOWNSTREAM STAGES (mirror app.py / dashboard/app.py)
+# =========================================================
+def build_frames(bodies, ids, day):
+    # Dhan JSON decode + candle frame construction, no network
+    return {
+        sid: frame_from_response(redate(bodies[int(sid) % len(bodies)], day))
+        for sid in ids
+    }
+
+
+def per_symbol(fn, frames):
+    return [fn(df) for df in frames.values()]
+
+
+def incremental_cold(frames):
+    states = IndicatorStates()
+    return [states.sync(sid, df) for sid, df in frames.items()]
+
+
+def scan_results(ind):
+    # Shape of the scanner snapshot: symbol info joined with indicators
+    return ind.assign(
+        company="Company " + ind.index,
+        ltp=ind["close"].round(2),
+    ).reset_index()
+
+
+def app_table(results):
+    # app.py load_scan: per-row fields, Bucket for the whole column
+    table = pd.DataFrame([{
+        "security_id": r["security_id"],
+        "Company": r["company"],
+        "Price": float(r["close"]),
+        "RSI": round(float(r["rsi"]), 2),
+        "Volume": int(r["volume"]),
+        "ADX": float(r["adx"]),
+        "VWAP Dist %": round((float(r["close"]) / float(r["vwap"]) - 1) * 100, 2),
+        "Volume Spike": bool(r["volume_spike"]),
+        "RSI Signal": "—",
+    } for r in results.to_dict("records")])
+    table["Bucket"] = rsi_buckets(results["rsi"])
+    return table.set_index("security_id")
+
+
+def filter_sets(table):
+    # Compiled on every app.py run, then all sets masked together
+    return FilterSets(DEFAULT_SETS).evaluate(table)
+
+
+def rankings_for(sets, top_n=5):
+    return [BucketRanking(sets.mask_fn(name), n=top_n) for name in sets.names]
+
+
+def display_frames(rankings, top_n=5, dirty_only=False):
+    # app.py render_section: one display frame per non-empty bucket
+    sections = []
+    for ranking in rankings:
+        for bucket in RSI_BUCKET_ORDER:
+            if dirty_only and bucket not in ranking.dirty:
+                continue
+            ids = ranking.top(bucket, top_n)
+            if not ids:
+                continue
+            display = ranking.table.loc[ids, ["Company", "Price", "RSI", "Volume", "RSI Signal"]]
+            display = display.assign(
+                Price=display["Price"].round(0).astype("Int64"),
+                RSI=display["RSI"].round(0).astype("Int64"),
+            )
+            sections.append(display)
+    return sections
+
+
+def render_prep(table):
+    # First render of a session: cold-load every set's ranking in one pass
+    rankings = rankings_for(FilterSets(DEFAULT_SETS))
+    update_rankings(rankings, table, RANK_COLUMNS)
+    return display_frames(rankings)
+
+
+def changed_table(table, fraction=0.05, seed=0):
+    # Next snapshot: a few symbols ticked (price / RSI / volume / bucket)
+    rng = np.random.default_rng(seed)
+    new = table.copy()
+    rows = rng.choice(len(new), max(1, int(len(new) * fraction)), replace=False)
+    new.iloc[rows, new.columns.get_loc("RSI")] = rng.uniform(0, 100, len(rows)).round(2)
+    new.iloc[rows, new.columns.get_loc("Volume")] += rng.integers(1, 10_000, len(rows))
+    new["Bucket"] = rsi_buckets(new["RSI"])
+    return new
+
+
+def render_refresh(table, new, repeat):
+    # Refresh: re-rank changed rows, rebuild only touched buckets' frames
+    best = float("inf")
+    for _ in range(repeat):
+        rankings = rankings_for(FilterSets(DEFAULT_SETS))
+        update_rankings(rankings, table, RANK_COLUMNS)
+        start = time.perf_counter()
+        update_rankings(rankings, new, RANK_COLUMNS)
+        display_frames(rankings, dirty_only=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# =========================================================
+# ONE UNIVERSE SIZE
+# =========================================================
+def run_size(n, bodies, server, repeat, skip_fetch):
+    ids = [str(100000 + i) for i in range(n)]
+    day = data_fetcher.session_start().date()
+    timings = {}
+
+    if not skip_fetch:
+        point_fetchers_at(server.url)
+        fresh_store()
+        timings["fetch threaded (cold)"], _ = timed(lambda: fetch_threaded(ids))
+        fresh_store()
+        timings["fetch async (cold)"], _ = timed(lambda: fetch_async(ids))
+        timings["fetch async (warm store)"], _ = timed(lambda: fetch_async(ids))
+
+    timings["json decode + DataFrame"], frames = timed(
+        lambda: build_frames(bodies, ids, day), repeat
+    )
+    frames = {sid: df for sid, df in frames.items() if len(df) >= MIN_CANDLES}
+
+    for name, fn in (
+        ("compute_ema(9)", lambda df: compute_ema(df["close"], 9)),
+        ("compute_rsi", lambda df: compute_rsi(df["close"])),
+        ("compute_vwap", compute_vwap),
+        ("compute_macd", lambda df: compute_macd(df["close"])),
+        ("compute_adx", compute_adx),
+        ("compute_supertrend", compute_supertrend),
+        ("volume_spike", lambda df: volume_spike(df["volume"])),
+    ):
+        timings[f"per-symbol {name}"], _ = timed(
+            lambda: per_symbol(fn, frames), repeat
+        )
+
+    timings["incremental engine (cold)"], _ = timed(
+        lambda: incremental_cold(frames), repeat
+    )
+    timings["build_panel"], panel = timed(
+        lambda: build_panel(frames, min_bars=MIN_CANDLES), repeat
+    )
+    timings["compute_panel (vectorized)"], ind = timed(
+        lambda: compute_panel(panel), repeat
+    )
+
+    results = scan_results(ind)
+    timings["assign_buckets (dashboard)"], _ = timed(lambda: assign_buckets(results), repeat)
+    timings["app table + rsi_buckets"], table = timed(
+        lambda: app_table(results), repeat
+    )
+    timings["filter sets"], _ = timed(lambda: filter_sets(table), repeat)
+    timings["render prep"], _ = timed(lambda: render_prep(table), repeat)
+    timings["render refresh (5% changed)"] = render_refresh(
+        table, changed_table(table), repeat
+    )
+
+    return timings
+
+
+def report(all_timings, baseline=None, threshold=0.2):
+    regressions = []
+    for n, timings in all_timings.items():
+        print(f"\n{n} symbols")
+        for stage, secs in timings.items():
+            line = f"  {stage:<32}: {secs:9.4f} s"
+            base = (baseline or {}).get(n, {}).get(stage)
+            if base:
+                change = secs / base - 1
+                line += f"  ({change:+.0%} vs baseline)"
+                if change > threshold:
+                    line += "  <-- REGRESSION"
+                    regressions.append((n, stage))
+            print(line)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="300,2000,10000")
+    ap.add_argument("--fixtures", default=FIXTURE_DIR)
+    ap.add_argument("--latency", type=float, default=0.0,
+                    help="mock server latency per request (seconds)")
+    ap.add_argument("--repeat", type=int, default=3,
+                    help="best-of-N for compute stages (fetch runs once)")
+    ap.add_argument("--skip-fetch", action="store_true")
+    ap.add_argument("--save", help="write timings to this JSON file")
+    ap.add_argument("--compare", help="baseline JSON from --save")
+    ap.add_argument("--threshold", type=float, default=0.2,
+                    help="relative slowdown reported as a regression")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.fixtures) or not load_fixtures(args.fixtures):
+        args.fixtures = tempfile.mkdtemp(prefix="bench_fixtures_")
+        synthesize(50, args.fixtures)
+    bodies = load_fixtures(args.fixtures)
+
+    # Warm numba JIT outside the timed region
+    if njit:
+        day = data_fetcher.session_start().date()
+        compute_panel(build_panel(build_frames(bodies, ["100000"], day)))
+
+    print(f"Scan benchmark: {len(bodies)} fixtures from {args.fixtures} "
+          f"(kernel: {'numba' if njit else 'numpy'})")
+
+    all_timings = {}
+    with MockServer(fixture_dir=args.fixtures, latency=args.latency) as server:
+        for n in (int(s) for s in args.sizes.split(",")):
+            all_timings[str(n)] = run_size(
+                n, bodies, server, args.repeat, args.skip_fetch
+            )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+    regressions = report(all_timings, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(all_timings, fh, indent=2)
+
+    if regressions:
+        raise SystemExit(f"{len(regressions)} stage(s) regressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Supertrend microbenchmark: 2000 symbols x 375 bars (one 5m session week).
+
+    python -m benchmarks.bench_supertrend [--symbols 2000] [--bars 375]
+
+The legacy per-row .iloc loop is timed on a sample and extrapolated,
+since running it on the full universe takes minutes.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine.indicators import compute_supertrend, supertrend_arrays, njit
+
+
+def legacy_supertrend(df, period=10, multiplier=3):
+    # Pre-vectorization implementation, kept only as a timing baseline
+    high, low, close = df["high"], df["low"], df["close"]
+    tr = pd.concat([
+        high - low,
+        (high - close.shift()).abs(),
+        (low - close.shift()).abs()
+    ], axis=1).max(axis=1)
+    atr = tr.rolling(period).mean()
+    hl2 = (high + low) / 2
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+
+    supertrend = pd.Series(index=df.index, dtype=float)
+    direction = True
+    for i in range(len(df)):
+        if i == 0:
+            supertrend.iloc[i] = upperband.iloc[i]
+            continue
+        if close.iloc[i] > supertrend.iloc[i - 1]:
+            direction = True
+        elif close.iloc[i] < supertrend.iloc[i - 1]:
+            direction = False
+        supertrend.iloc[i] = lowerband.iloc[i] if direction else upperband.iloc[i]
+    return supertrend
+
+
+def synthetic_panel(symbols, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, (symbols, bars)), axis=1)
+    high = close + rng.random((symbols, bars))
+    low = close - rng.random((symbols, bars))
+    return high, low, close
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=2000)
+    ap.add_argument("--bars", type=int, default=375)
+    ap.add_argument("--legacy-sample", type=int, default=20)
+    args = ap.parse_args()
+
+    high, low, close = synthetic_panel(args.symbols, args.bars)
+    frames = [
+        pd.DataFrame({"high": high[i], "low": low[i], "close": close[i]})
+        for i in range(args.symbols)
+    ]
+
+    # Warm numba JIT outside the timed region
+    supertrend_arrays(high[:1], low[:1], close[:1])
+
+    sample = frames[:args.legacy_sample]
+    legacy = timed(lambda: [legacy_supertrend(f) for f in sample], repeat=1)
+    legacy *= args.symbols / len(sample)
+
+    per_symbol = timed(lambda: [compute_supertrend(f) for f in frames])
+    panel = timed(lambda: supertrend_arrays(high, low, close))
+
+    print(f"Supertrend, {args.symbols} symbols x {args.bars} bars "
+          f"(kernel: {'numba' if njit else 'numpy'})")
+    print(f"  legacy .iloc loop (extrapolated) : {legacy:9.3f} s")
+    print(f"  compute_supertrend per symbol    : {per_symbol:9.3f} s  "
+          f"({legacy / per_symbol:,.0f}x)")
+    print(f"  supertrend_arrays on 2-D panel   : {panel:9.3f} s  "
+          f"({legacy / panel:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Recorded Dhan charts/intraday responses for the scan benchmarks.
+
+    python -m benchmarks.fixtures record --count 50   # needs DHAN_ACCESS_TOKEN
+    python -m benchmarks.fixtures synth --count 50    # offline, random walks
+
+Each fixture is the raw JSON body Dhan returned for one symbol, saved as
+benchmarks/data/<security_id>.json. engine/mock_dhan.py replays them
+re-dated onto the requested session, so a recording from any day serves
+any benchmark run; larger universes than the fixture set cycle through it.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from engine.candle_store import to_epoch
+from engine.mock_dhan import load_fixtures, redate  # noqa: F401  (re-exported)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+# =========================================================
+# RECORD / SYNTHESIZE
+# =========================================================
+def record(security_ids, out_dir=FIXTURE_DIR, interval=5):
+    import requests
+    from engine.data_fetcher import URL, TOKEN, build_payload, session_start
+
+    if not TOKEN:
+        raise EnvironmentError("DHAN_ACCESS_TOKEN is required to record fixtures")
+
+    os.makedirs(out_dir, exist_ok=True)
+    start = session_start()
+    for sid in security_ids:
+        payload = build_payload(sid, interval, start, start.strftime("%Y-%m-%d"))
+        r = requests.post(URL, json=payload,
+                          headers={"access-token": TOKEN}, timeout=10)
+        if r.status_code != 200:
+            print(f"[WARN] {sid} → {r.status_code}")
+            continue
+        with open(os.path.join(out_dir, f"{sid}.json"), "wb") as fh:
+            fh.write(r.content)
+        time.sleep(0.05)
+
+
+def synthesize(count, out_dir=FIXTURE_DIR, bars=75, interval=5, seed=0):
+    """Dhan-shaped random-walk sessions (09:15 IST, `bars` candles)."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    open_ts = to_epoch(datetime(2024, 1, 1, 9, 15))
+
+    for i in range(count):
+        close = rng.uniform(20, 3000) * np.exp(
+            np.cumsum(rng.normal(0, 0.002, bars))
+        )
+        spread = close * rng.uniform(0, 0.003, bars)
+        body = {
+            "open": np.round(close + rng.normal(0, 1, bars) * spread, 2).tolist(),
+            "high": np.round(close + spread, 2).tolist(),
+            "low": np.round(close - spread, 2).tolist(),
+            "close": np.round(close, 2).tolist(),
+            "volume": rng.integers(500, 500_000, bars).tolist(),
+            "timestamp": (open_ts + np.arange(bars) * interval * 60).tolist(),
+        }
+        with open(os.path.join(out_dir, f"{100000 + i}.json"), "w") as fh:
+            json.dump(body, fh)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record or synthesize Dhan fixtures")
+    ap.add_argument("mode", choices=["record", "synth"])
+    ap.add_argument("--count", type=int, default=50)
+    ap.add_argument("--out", default=FIXTURE_DIR)
+    args = ap.parse_args()
+
+    if args.mode == "record":
+        from engine.symbol_master import get_master
+        record(get_master().security_ids[:args.count].tolist(), args.out)
+    else:
+        synthesize(args.count, args.out)
+    print(f"[OK] fixtures in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
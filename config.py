@@ -1,4 +1,102 @@
 INTERVAL = 5
+# Multi-timeframe (engine/resample.py): candles are fetched once at
+# FEED_INTERVAL and INTERVAL / TIMEFRAMES bars are derived locally.
+# Each extra timeframe adds rsi_15m, ema9_15m, supertrend_dir_15m, ... columns
+FEED_INTERVAL = 1
+TIMEFRAMES = (15, 60)
+SYMBOLS_CSV = "stocks.csv"
+SYMBOL_MASTER_CACHE = "stocks.npz"   # binary cache, rebuilt when the CSV changes
 RSI_PERIOD = 14
+RSI_MODE = "wilder"      # "wilder" | "ema" | "sma" (see engine/indicators.rsi_array)
 MIN_CANDLES = 20
 MAX_WORKERS = 16   # SPEED CONTROL (safe for Dhan)
+
+# Local candle cache (see engine/candle_store.py)
+CANDLE_STORE_DIR = "candle_store"
+CANDLE_STORE_RETENTION_DAYS = 10
+
+# Async batch fetcher (see engine/async_fetcher.py)
+FETCH_CONCURRENCY = 32   # starting in-flight limit, adapted at runtime
+SCAN_LIMIT = None        # None = full stocks.csv universe
+LTP_PREFILTER_TOLERANCE = 0.10   # dashboard scans fetch symbols within ±10% of their price filters
+
+# Dhan API endpoint; DHAN_BASE_URL in the environment / .env overrides it,
+# e.g. http://127.0.0.1:8765 for the local stand-in (python -m engine.mock_dhan)
+DHAN_BASE_URL = "https://api.dhan.co"
+
+# Dhan request budget (see engine/rate_limiter.py)
+DHAN_REQUESTS_PER_SEC = 20
+DHAN_BURST = 20
+CONCURRENCY_MIN = 2
+CONCURRENCY_MAX = 64
+TARGET_LATENCY = 1.5     # seconds; slower responses shrink concurrency
+MAX_RETRIES = 4          # on 429 / 5xx / transport errors
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Indicator computation: "batch" recomputes full history each refresh,
+# "incremental" keeps per-symbol running state (engine/incremental.py),
+# "panel" computes the whole universe as one 2-D array (engine/panel.py),
+# "process" pipelines fetch -> shared-memory panels -> process pool
+ENGINE_MODE = "panel"
+PROCESS_WORKERS = None   # None = os.cpu_count()
+PROCESS_CHUNK = 128      # symbols per shared-memory panel handed to a worker
+
+# Background scanner (python -m engine.scanner) and its shared snapshot
+SNAPSHOT_DB = "scan_snapshot.db"
+SCAN_DELAY_SECONDS = 5    # wait after each candle close before scanning
+SCAN_GRACE_SECONDS = 60   # allowance for the daemon's own scan time
+# Seconds; older snapshots make a dashboard scan itself. One daemon cycle
+# plus its scan time, so a running daemon is never second-guessed (daemon
+# snapshots also carry their next_run, checked first)
+SNAPSHOT_MAX_AGE = INTERVAL * 60 + SCAN_DELAY_SECONDS + SCAN_GRACE_SECONDS
+SCAN_LOOKBACK_DAYS = 7    # candle history per scan, so indicators are warm at the open
+NIFTY_SECURITY_ID = "26000"
+METRICS_PORT = 9108       # scanner's Prometheus /metrics endpoint (None = off)
+
+# Streaming mode (python -m engine.scanner --stream, see engine/tick_feed.py);
+# DHAN_FEED_URL in the environment overrides, e.g. ws://127.0.0.1:8766 for
+# the local replay stand-in (python -m engine.mock_feed)
+DHAN_FEED_URL = "wss://api-feed.dhan.co"
+STREAM_PUBLISH_SECONDS = 1.0   # live snapshot cadence while ticks arrive
+
+# Alerts on every published scan (engine/alerts.py)
+ALERT_RSI_LEVELS = (30, 50, 70)   # RSI cross rules, both directions
+ALERT_SINKS = ("log",)            # any of "log", "webhook", "desktop"
+ALERT_LOG = "alerts.log"          # JSON lines
+ALERT_WEBHOOK_URL = None          # e.g. a local Slack / ntfy relay
+ALERT_QUEUE_SIZE = 10_000         # alerts waiting for slow sinks before dropping
+
+# Bucket thresholds, tunable without code changes (rsi_engine.rsi_buckets,
+# engine/market_buckets.assign_buckets). Both tables are in display order.
+# RSI_BUCKETS: (lowest RSI, label) -- each label covers RSI >= its bound
+RSI_BUCKETS = (
+    (80, "Extreme Bought"),
+    (70, "Overbought"),
+    (55, "Bullish"),
+    (45, "Bearish"),
+    (30, "Oversold"),
+    (float("-inf"), "Extreme Sold"),
+)
+# MARKET_BUCKETS: (label, [(column, op, number or column), ...] ANDed);
+# the first matching rule wins, rows matching none are MARKET_BUCKET_DEFAULT
+MARKET_BUCKETS = (
+    ("Extreme Bought", [("rsi", ">=", 80), ("close", ">", "vwap"), ("adx", ">=", 25)]),
+    ("Overbought", [("rsi", ">=", 70), ("rsi", "<", 80), ("close", ">", "ema9"), ("adx", ">=", 20)]),
+    ("Bullish Trend", [("rsi", ">=", 55), ("rsi", "<", 70), ("ema9", ">", "ema26"),
+                       ("ema26", ">", "ema50"), ("close", ">", "vwap")]),
+    ("Bearish Trend", [("rsi", ">", 30), ("rsi", "<=", 45), ("ema9", "<", "ema26"),
+                       ("ema26", "<", "ema50"), ("close", "<", "vwap")]),
+    ("Oversold", [("rsi", ">", 20), ("rsi", "<=", 30)]),
+    ("Extreme Sold", [("rsi", "<=", 20)]),
+)
+MARKET_BUCKET_DEFAULT = "Neutral"
+
+# Dashboard filter sets (see engine/filter_sets.py); missing file = two default sets
+FILTER_SETS_FILE = "filter_sets.json"
+
+# Dashboard charts (dashboard/charts.py)
+CHART_MAX_POINTS = 1500   # points per trace after downsampling (~ chart width in px)
+CHART_CANDLE_MAX = 400    # longer visible ranges switch from candlesticks to WebGL
+CHART_DAYS = (1, 3, 5)    # history choices in the detail view
+CHART_INTERVALS = tuple(sorted({FEED_INTERVAL, INTERVAL}))   # bar sizes offered (both stored)
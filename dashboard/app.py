@@ -5,14 +5,21 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
 # ================= IMPORTS =================
+import time
 import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.io as pio
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
-from engine.symbols import load_symbols
-from engine.indicator_engine import run_indicator_engine
-from engine.market_buckets import assign_bucket
-from dashboard.charts import candle_chart, rsi_chart
+from engine.scanner import latest_results, candles_for
+from engine.symbols import price_bands
+from config import LTP_PREFILTER_TOLERANCE, CHART_DAYS, CHART_INTERVALS, INTERVAL
+from engine.market_buckets import assign_buckets, BUCKET_ORDER
+from engine.metrics import METRICS, summary_frame
+from engine.ranking import bucket_tables
+from dashboard.charts import chart_arrays, candle_chart, rsi_chart
 
 # ================= PAGE CONFIG =================
 st.set_page_config(
@@ -45,75 +52,156 @@ only_volume_spike = st.sidebar.checkbox(
 
 # ================= HEADER =================
 st.markdown("## 📊 Trade AI – Market Regime Scanner")
+
+# ================= LATEST SCAN (engine/scanner.py) =================
+with st.spinner("🔄 Loading latest scan..."):
+    scan, meta = latest_results(
+        price_bands=price_bands([(price_min, price_max)], LTP_PREFILTER_TOLERANCE)
+    )
+
+scanned_at = datetime.fromtimestamp(meta.get("scanned_at", 0))
 st.caption(
-    f"⏱ Last refreshed: {datetime.now().strftime('%d %b %Y, %I:%M:%S %p')}"
+    f"⏱ Last scanned: {scanned_at.strftime('%d %b %Y, %I:%M:%S %p')}"
 )
 
-# ================= LOAD SYMBOLS (CSV LTP FILTER) =================
-symbols_df = load_symbols(price_min, price_max)
+# ================= LTP FILTER (last close) =================
+if scan.empty:
+    st.warning("No valid data after indicator calculation.")
+    st.stop()
+
+scan = scan[(scan["close"] >= price_min) & (scan["close"] <= price_max)]
 
-if symbols_df.empty:
+if scan.empty:
     st.warning("No symbols in this LTP range.")
     st.stop()
 
-st.info(f"📌 Symbols after LTP filter: {len(symbols_df)}")
-
-# ================= RUN INDICATOR ENGINE =================
-with st.spinner("🔄 Calculating indicators..."):
-    data = run_indicator_engine(symbols_df)
+st.info(f"📌 Symbols after LTP filter: {len(scan)}")
 
-if not data:
-    st.warning("No valid data after indicator calculation.")
-    st.stop()
+scan = scan.round({
+    "rsi": 1, "ema9": 2, "ema26": 2, "ema50": 2,
+    "vwap": 2, "macd": 2, "adx": 1
+})
 
 # ================= ASSIGN BUCKETS =================
-bucket_map = {}
-for d in data:
-    if only_volume_spike and not d["volume_spike"]:
-        continue
+# One categorical partition of the scan -> every bucket table at once
+with METRICS.timer("bucket"):
+    scan["bucket"] = assign_buckets(scan)   # categorical, thresholds from config.MARKET_BUCKETS
+    keep = scan["volume_spike"].to_numpy(dtype=bool) if only_volume_spike \
+        else np.ones(len(scan), dtype=bool)
+    bucket_map = bucket_tables(scan, {"scan": keep}, BUCKET_ORDER, bucket="bucket")["scan"]
+
+# ================= CHARTS (built on demand, cached) =================
+# Keyed by the candle the scan ended on: a new bar invalidates, reruns
+# and other viewers of the same scan reuse the serialized figures
+@st.cache_data(max_entries=256, show_spinner=False)
+def chart_json(security_id, until, days, minutes):
+    ohlc = candles_for(security_id, interval=minutes, until=until, days=days)
+    if ohlc.empty:
+        return None, None
+    arrays = chart_arrays(ohlc)
+    return candle_chart(arrays).to_json(), rsi_chart(arrays).to_json()
+
+
+# Fragment: picking another symbol reruns only the detail view
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", lambda f: f)
+
+
+@fragment
+def detail_view(stocks):
+    labels = {
+        f"{s['bucket']}  ·  {s['company']}  |  LTP ₹{s['ltp']}": s
+        for s in stocks
+    }
+    choice = st.selectbox(
+        "📈 Chart a symbol", ["—"] + list(labels), key="detail_symbol"
+    )
+    s = labels.get(choice)
+    if s is None:
+        return
+
+    st.write(
+        f"""
+        **RSI:** {s['rsi']}  
+        **ADX:** {s['adx']}  
+        **VWAP:** {s['vwap']}  
+        **EMA 9 / 26 / 50:** {s['ema9']} / {s['ema26']} / {s['ema50']}  
+        **MACD:** {s['macd']}  
+        **Volume Spike:** {'✅' if s['volume_spike'] else '❌'}
+        """
+    )
+
+    # Higher timeframes resampled from the same feed (engine/resample.py)
+    frames = [m for m in meta.get("timeframes", []) if pd.notna(s.get(f"rsi_{m}m"))]
+    if frames:
+        st.dataframe(
+            pd.DataFrame([{
+                "Timeframe": f"{m}m",
+                "RSI": round(s[f"rsi_{m}m"], 1),
+                "EMA 9 / 26 / 50": f"{s[f'ema9_{m}m']:.2f} / {s[f'ema26_{m}m']:.2f} / "
+                                   f"{s[f'ema50_{m}m']:.2f}",
+                "Supertrend": "↑" if s[f"supertrend_dir_{m}m"] == 1 else "↓",
+            } for m in frames]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    history, bars = st.columns(2)
+    with history:
+        days = st.radio(
+            "History", CHART_DAYS, horizontal=True, key="detail_days",
+            format_func=lambda d: "Session" if d == 1 else f"{d} days"
+        )
+    with bars:
+        minutes = st.radio(
+            "Bars", CHART_INTERVALS, horizontal=True, key="detail_minutes",
+            index=CHART_INTERVALS.index(INTERVAL), format_func=lambda m: f"{m}m"
+        )
+
+    # Everything up to the end of the scan's last bar, at any bar size
+    until = int(s["last_ts"]) + meta.get("interval", INTERVAL) * 60 - 1
+
+    with METRICS.timer("render.chart"):
+        candle_js, rsi_js = chart_json(str(s["security_id"]), until, days, minutes)
+        if candle_js is None:
+            st.info("No candles stored for this symbol yet.")
+            return
+        st.plotly_chart(pio.from_json(candle_js), use_container_width=True)
+        st.plotly_chart(pio.from_json(rsi_js), use_container_width=True)
 
-    bucket = assign_bucket(d)
-    d["bucket"] = bucket
-    bucket_map.setdefault(bucket, []).append(d)
-
-# ================= BUCKET DISPLAY ORDER =================
-BUCKET_ORDER = [
-    "Extreme Bought",
-    "Overbought",
-    "Bullish Trend",
-    "Bearish Trend",
-    "Oversold",
-    "Extreme Sold",
-    "Neutral"
-]
 
 # ================= DISPLAY =================
+render_start = time.perf_counter()
+
+TABLE_COLUMNS = {
+    "company": "Company", "ltp": "LTP", "rsi": "RSI", "adx": "ADX",
+    "vwap": "VWAP", "ema9": "EMA 9", "ema26": "EMA 26", "ema50": "EMA 50",
+    "macd": "MACD", "volume_spike": "Spike",
+}
+
+shown = []
 for bucket in BUCKET_ORDER:
-    stocks = bucket_map.get(bucket, [])
-    if not stocks:
+    stocks = bucket_map.get(bucket)
+    if stocks is None:
         continue
 
     st.markdown(f"### 🪣 {bucket} ({len(stocks)})")
-
-    for s in stocks:
-        with st.expander(f"{s['company']}  |  LTP ₹{s['ltp']}"):
-            st.write(
-                f"""
-                **RSI:** {s['rsi']}  
-                **ADX:** {s['adx']}  
-                **VWAP:** {s['vwap']}  
-                **EMA 9 / 26 / 50:** {s['ema9']} / {s['ema26']} / {s['ema50']}  
-                **MACD:** {s['macd']}  
-                **Volume Spike:** {'✅' if s['volume_spike'] else '❌'}
-                """
-            )
-
-            st.plotly_chart(
-                candle_chart(s["ohlc"]),
-                use_container_width=True
-            )
-
-            st.plotly_chart(
-                rsi_chart(s["ohlc"]["close"]),
-                use_container_width=True
-            )
+    st.dataframe(
+        stocks[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS),
+        use_container_width=True,
+        hide_index=True
+    )
+    shown.extend(stocks.to_dict("records"))
+
+METRICS.observe("render", time.perf_counter() - render_start)
+
+# ================= DETAIL VIEW =================
+st.markdown("---")
+detail_view(shown)
+
+# ================= DIAGNOSTICS =================
+with st.expander("🩺 Diagnostics – stage latency", expanded=False):
+    st.dataframe(
+        summary_frame(meta.get("metrics"), METRICS.summary()),
+        use_container_width=True,
+        hide_index=True
+    )
@@ -1,24 +1,162 @@
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
-from engine.indicators import compute_rsi, compute_vwap
 
-def candle_chart(df):
-    vwap = compute_vwap(df)
+from config import CHART_MAX_POINTS, CHART_CANDLE_MAX
+from dashboard.downsample import lttb, ohlc_bins
+from engine.candle_store import IST
+from engine.indicators import compute_ema, rsi_array, supertrend_arrays
+from engine.pivots import pivot_levels
+
+IST_OFFSET = int(IST.utcoffset(None).total_seconds())
+
+
+# =========================================================
+# CACHED ARRAYS (every overlay computed once, on the full history)
+# =========================================================
+def _session_cumsum(x, starts):
+    cs = np.cumsum(x)
+    base = np.r_[0.0, cs[starts[1:] - 1]]
+    return cs - np.repeat(base, np.diff(np.r_[starts, len(x)]))
+
+
+def chart_arrays(ohlc):
+    """Candles + VWAP / EMA / Supertrend / RSI / pivots as plain arrays."""
+    ts = ohlc["timestamp"].to_numpy(dtype=np.int64)
+    o, h, l, c, v = (ohlc[k].to_numpy(dtype=float)
+                     for k in ("open", "high", "low", "close", "volume"))
+
+    # Sessions by IST calendar day; VWAP resets at each session open
+    day = (ts + IST_OFFSET) // 86400
+    starts = np.r_[0, np.flatnonzero(np.diff(day)) + 1] if len(ts) else np.array([0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = _session_cumsum((h + l + c) / 3 * v, starts) / _session_cumsum(v, starts)
+
+    close = pd.Series(c)
+    st, st_dir = supertrend_arrays(h, l, c)
+
+    arrays = {
+        "ts": ts, "open": o, "high": h, "low": l, "close": c,
+        "vwap": vwap,
+        "ema9": compute_ema(close, 9).to_numpy(),
+        "ema26": compute_ema(close, 26).to_numpy(),
+        "ema50": compute_ema(close, 50).to_numpy(),
+        "supertrend": st, "supertrend_dir": st_dir,
+        "rsi": rsi_array(c),
+        "pivots": {},
+        "last_session": int(starts[-1]),
+    }
+
+    # Classic pivots for the latest session, from the previous one
+    if len(starts) > 1:
+        prev = slice(starts[-2], starts[-1])
+        arrays["pivots"] = {
+            k: float(val) for k, val in pivot_levels(
+                h[prev].max(), l[prev].min(), c[prev][-1]
+            ).items() if k in ("P", "R1", "R2", "S1", "S2")
+        }
+    return arrays
+
+
+def window(arrays, since=None):
+    """Visible range: bars with ts >= since (None = everything)."""
+    if since is None:
+        return 0, len(arrays["ts"])
+    return int(np.searchsorted(arrays["ts"], since, side="left")), len(arrays["ts"])
+
+
+# =========================================================
+# AXIS: bar positions (no overnight gaps) labelled with IST times
+# =========================================================
+def _time_axis(fig, ts, lo, hi, ticks=8):
+    pos = np.unique(np.linspace(lo, hi - 1, min(ticks, hi - lo)).astype(int))
+    labels = [
+        pd.Timestamp(int(ts[p]), unit="s", tz=IST).strftime("%d %b %H:%M")
+        for p in pos
+    ]
+    fig.update_xaxes(tickvals=pos.tolist(), ticktext=labels, range=[lo - 0.5, hi - 0.5])
+
+
+def _line(fig, x, y, name, max_points, gaps=False, **kw):
+    ok = ~np.isnan(y)
+    x, y = x[ok], y[ok]
+
+    if not gaps:
+        keep = lttb(x, y, max_points)
+        fig.add_trace(go.Scattergl(x=x[keep], y=y[keep], name=name, mode="lines", **kw))
+        return
+
+    # Downsample each contiguous run on its own and keep NaN breaks between
+    # runs, so a line never bridges bars where the series is undefined
+    xs, ys = [], []
+    for seg in np.split(np.arange(len(x)), np.flatnonzero(np.diff(x) > 1) + 1):
+        if not len(seg):
+            continue
+        keep = seg[lttb(x[seg], y[seg], max(3, max_points * len(seg) // len(x)))]
+        xs += [x[keep], [np.nan]]
+        ys += [y[keep], [np.nan]]
+    fig.add_trace(go.Scattergl(
+        x=np.concatenate(xs) if xs else x, y=np.concatenate(ys) if ys else y,
+        name=name, mode="lines", **kw
+    ))
+
+
+# =========================================================
+# FIGURES
+# =========================================================
+def candle_chart(arrays, since=None, max_points=CHART_MAX_POINTS):
+    """
+    Price + overlays over the visible range. Up to CHART_CANDLE_MAX bars
+    draw as candlesticks; longer ranges switch to WebGL traces: a
+    high/low band from min/max-per-column bins plus an LTTB close line.
+    """
+    lo, hi = window(arrays, since)
+    x = np.arange(lo, hi)
+    o, h, l, c = (arrays[k][lo:hi] for k in ("open", "high", "low", "close"))
     fig = go.Figure()
 
-    fig.add_candlestick(
-        open=df.open, high=df.high,
-        low=df.low, close=df.close
-    )
-    fig.add_scatter(y=vwap, name="VWAP")
+    if hi - lo <= CHART_CANDLE_MAX:
+        fig.add_candlestick(x=x, open=o, high=h, low=l, close=c, name="Price")
+    else:
+        starts, bo, bh, bl, bc = ohlc_bins(o, h, l, c, max_points // 2)
+        bx = x[starts]
+        fig.add_trace(go.Scattergl(x=bx, y=bl, mode="lines", line=dict(width=0),
+                                   showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scattergl(x=bx, y=bh, mode="lines", line=dict(width=0),
+                                   fill="tonexty", fillcolor="rgba(120,120,120,0.25)",
+                                   name="High / Low"))
+        _line(fig, x, c, "Close", max_points, line=dict(color="#222", width=1))
+
+    _line(fig, x, arrays["vwap"][lo:hi], "VWAP", max_points, line=dict(width=1.5))
+    for key, label in (("ema9", "EMA 9"), ("ema26", "EMA 26"), ("ema50", "EMA 50")):
+        _line(fig, x, arrays[key][lo:hi], label, max_points, line=dict(width=1))
+
+    # Supertrend: one trace per direction, gaps where the trend is the other way
+    st, st_dir = arrays["supertrend"][lo:hi], arrays["supertrend_dir"][lo:hi]
+    for direction, color in ((1, "#2ca02c"), (-1, "#d62728")):
+        _line(fig, x, np.where(st_dir == direction, st, np.nan),
+              "Supertrend ↑" if direction == 1 else "Supertrend ↓",
+              max_points, gaps=True, line=dict(color=color, width=1.5))
 
-    fig.update_layout(height=350, margin=dict(t=20,b=20))
+    last = max(arrays["last_session"], lo)
+    for name, level in arrays["pivots"].items():
+        fig.add_shape(type="line", x0=last, x1=hi - 1, y0=level, y1=level,
+                      line=dict(width=1, dash="dot", color="#888"))
+        fig.add_annotation(x=hi - 1, y=level, text=name, showarrow=False,
+                           xanchor="left", font=dict(size=10, color="#888"))
+
+    _time_axis(fig, arrays["ts"], lo, hi)
+    fig.update_layout(height=350, margin=dict(t=20, b=20),
+                      xaxis_rangeslider_visible=False, legend=dict(orientation="h"))
     return fig
 
-def rsi_chart(close):
-    rsi = compute_rsi(close)
+
+def rsi_chart(arrays, since=None, max_points=CHART_MAX_POINTS):
+    lo, hi = window(arrays, since)
     fig = go.Figure()
-    fig.add_scatter(y=rsi)
+    _line(fig, np.arange(lo, hi), arrays["rsi"][lo:hi], "RSI", max_points)
     fig.add_hline(y=70)
     fig.add_hline(y=30)
-    fig.update_layout(height=200)
+    _time_axis(fig, arrays["ts"], lo, hi)
+    fig.update_layout(height=200, margin=dict(t=20, b=20), showlegend=False)
     return fig
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+# =========================================================
+# LINE SERIES: Largest-Triangle-Three-Buckets
+# =========================================================
+def lttb(x, y, n_out):
+    """
+    Indices of the LTTB subset of (x, y) with at most n_out points.
+    Keeps the first and last point and, per bucket, the point spanning
+    the largest triangle with its neighbours, so peaks survive.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo = edges[i]
+        hi = max(edges[i + 1], lo + 1)
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        nxt = slice(hi, max(nxt_hi, hi + 1))
+
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx
+
+
+# =========================================================
+# CANDLES: OHLC re-binning (min/max per pixel column)
+# =========================================================
+def ohlc_bins(o, h, l, c, n_out):
+    """
+    Merge consecutive bars into at most n_out bars: first open, max high,
+    min low, last close. Returns (bin start indices, o, h, l, c).
+    """
+    n = len(c)
+    if n <= n_out:
+        return np.arange(n), o, h, l, c
+
+    starts = np.unique(np.linspace(0, n, n_out, endpoint=False).astype(int))
+    ends = np.r_[starts[1:], n] - 1
+    return (
+        starts,
+        o[starts],
+        np.maximum.reduceat(h, starts),
+        np.minimum.reduceat(l, starts),
+        c[ends],
+    )
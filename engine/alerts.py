@@ -0,0 +1,257 @@
+"""
+Event-driven alerts on scan results.
+
+Every published scan (polling or --stream) goes through get_engine().evaluate():
+each rule is one vectorized comparison of the previous and current value
+of a column over the whole universe, so thousands of symbols x dozens of
+rules cost a few NumPy passes. A rule fires at most once per symbol per
+candle; alerts go to the configured sinks from a background thread, so a
+slow webhook never holds up the scan.
+
+Sinks (ALERT_SINKS): "log" (JSON lines in ALERT_LOG), "webhook"
+(POST to ALERT_WEBHOOK_URL), "desktop" (plyer, else notify-send).
+"""
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import (
+    ALERT_RSI_LEVELS, ALERT_SINKS, ALERT_LOG, ALERT_WEBHOOK_URL, ALERT_QUEUE_SIZE
+)
+from engine.metrics import METRICS
+
+
+# =========================================================
+# RULES
+# =========================================================
+class Rule:
+    """
+    kind: "above" / "below" – column crosses `level` upwards / downwards;
+    "flip" – a non-zero column changes sign; "rise" – turns truthy.
+    """
+
+    def __init__(self, name, column, kind, level=0.0, message=None):
+        self.name = name
+        self.column = column
+        self.kind = kind
+        self.level = level
+        self.message = message or name
+
+    def fire(self, prev, now):
+        """Vectorized: bool array over symbols."""
+        with np.errstate(invalid="ignore"):
+            if self.kind == "above":
+                return (prev < self.level) & (now >= self.level)
+            if self.kind == "below":
+                return (prev > self.level) & (now <= self.level)
+            if self.kind == "flip":
+                return (prev * now) < 0
+            return (prev == 0) & (now != 0)
+
+
+def default_rules(levels=ALERT_RSI_LEVELS):
+    rules = []
+    for level in levels:
+        rules += [
+            Rule(f"rsi_above_{level}", "rsi", "above", level, f"RSI crossed above {level}"),
+            Rule(f"rsi_below_{level}", "rsi", "below", level, f"RSI crossed below {level}"),
+        ]
+    return rules + [
+        Rule("vwap_above", "vwap_dist", "above", 0.0, "Price crossed above VWAP"),
+        Rule("vwap_below", "vwap_dist", "below", 0.0, "Price crossed below VWAP"),
+        Rule("supertrend_flip", "supertrend_dir", "flip", message="Supertrend flipped"),
+        Rule("volume_spike", "volume_spike", "rise", message="Volume spike"),
+    ]
+
+
+def _columns(results):
+    """Rule inputs as float arrays (missing columns -> NaN: never fire)."""
+    n = len(results)
+
+    def col(name):
+        if name not in results:
+            return np.full(n, np.nan)
+        return results[name].to_numpy(dtype=float)
+
+    # Latest bar close: the live price in both polling and stream results
+    close = col("close")
+    return {
+        "rsi": col("rsi"),
+        "vwap_dist": close - col("vwap"),
+        "supertrend_dir": col("supertrend_dir"),
+        "volume_spike": col("volume_spike"),
+    }
+
+
+# =========================================================
+# ENGINE
+# =========================================================
+class AlertEngine:
+    """
+    Keeps the last evaluated value of every rule column per symbol, so a
+    cross is caught between any two scans, however far apart, and
+    remembers the candle each (symbol, rule) last fired on.
+    """
+
+    def __init__(self, rules=None, dispatcher=None, recent=50):
+        self.rules = rules if rules is not None else default_rules()
+        self.dispatcher = dispatcher
+        self.prev = pd.DataFrame()   # security_id -> last value per rule column
+        self.fired = {}      # (security_id, rule) -> candle ts
+        self.recent = deque(maxlen=recent)
+
+    def _previous(self, ids, now, results):
+        seen = self.prev.reindex(ids)
+        prev = {c: seen[c].to_numpy(dtype=float) if c in seen else np.full(len(ids), np.nan)
+                for c in now}
+        # First sight of a symbol: its last closed bar's RSI
+        if "rsi_prev" in results:
+            prev["rsi"] = np.where(np.isnan(prev["rsi"]),
+                                   results["rsi_prev"].to_numpy(dtype=float), prev["rsi"])
+        return prev
+
+    def evaluate(self, results):
+        """Fire rules on one scan's results; returns the new alerts."""
+        if results.empty:
+            return []
+
+        with METRICS.timer("alerts.evaluate"):
+            ids = results["security_id"].astype(str).tolist()
+            candle = results["last_ts"].to_numpy() if "last_ts" in results \
+                else np.zeros(len(ids), dtype=np.int64)
+            now = _columns(results)
+            prev = self._previous(ids, now, results)
+
+            info = {c: results[c].tolist() if c in results else [None] * len(ids)
+                    for c in ("symbol", "company", "close")}
+
+            alerts = []
+            for rule in self.rules:
+                for i in np.flatnonzero(rule.fire(prev[rule.column], now[rule.column])):
+                    key = (ids[i], rule.name)
+                    if self.fired.get(key) == candle[i]:
+                        continue
+                    self.fired[key] = candle[i]
+                    alerts.append(self._alert(ids[i], info, i, rule, int(candle[i]),
+                                              now[rule.column][i]))
+
+            # Symbols outside this scan (price-band subsets) keep their values
+            current = pd.DataFrame(now, index=ids)
+            self.prev = current if self.prev.empty else \
+                pd.concat([self.prev[~self.prev.index.isin(ids)], current])
+
+        self.recent.extend(alerts)
+        if self.dispatcher:
+            for alert in alerts:
+                self.dispatcher.emit(alert)
+        return alerts
+
+    @staticmethod
+    def _alert(security_id, info, i, rule, candle_ts, value):
+        return {
+            "security_id": security_id,
+            "symbol": info["symbol"][i],
+            "company": info["company"][i],
+            "rule": rule.name,
+            "message": rule.message,
+            "value": None if np.isnan(value) else round(float(value), 2),
+            "price": None if info["close"][i] is None else float(info["close"][i]),
+            "candle_ts": candle_ts,
+            "at": time.time(),
+        }
+
+
+# =========================================================
+# SINKS
+# =========================================================
+def _text(alert):
+    return f"{alert['symbol'] or alert['security_id']}: {alert['message']}"
+
+
+class LogSink:
+    def __init__(self, path=ALERT_LOG):
+        self.path = path
+
+    def __call__(self, alert):
+        with open(self.path, "a") as fh:
+            fh.write(json.dumps(alert, default=str) + "\n")
+
+
+class WebhookSink:
+    def __init__(self, url=ALERT_WEBHOOK_URL, timeout=3):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, alert):
+        if self.url:
+            self.session.post(self.url, json={**alert, "text": _text(alert)},
+                              timeout=self.timeout)
+
+
+class DesktopSink:
+    def __init__(self):
+        try:
+            from plyer import notification
+        except ImportError:  # optional
+            notification = None
+        self.notification = notification
+        self.notify_send = shutil.which("notify-send")
+
+    def __call__(self, alert):
+        if self.notification:
+            self.notification.notify(title="RSI alert", message=_text(alert), timeout=5)
+        elif self.notify_send:
+            subprocess.run([self.notify_send, "RSI alert", _text(alert)], check=False)
+
+
+SINKS = {"log": LogSink, "webhook": WebhookSink, "desktop": DesktopSink}
+
+
+class AlertDispatcher:
+    """
+    Bounded queue drained by one daemon thread. emit() never blocks: if
+    the sinks fall behind and the queue is full, the alert is dropped and
+    counted. A failing sink is reported and skipped for that alert only.
+    """
+
+    def __init__(self, sinks, maxsize=ALERT_QUEUE_SIZE):
+        self.sinks = sinks
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def emit(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            for sink in self.sinks:
+                try:
+                    sink(alert)
+                except Exception as e:
+                    print(f"[WARN] alert sink {type(sink).__name__} failed → {e}")
+
+
+_ENGINE = None
+
+
+def get_engine():
+    # One engine per process (its dispatcher thread starts on first use)
+    global _ENGINE
+    if _ENGINE is None:
+        sinks = [SINKS[name]() for name in ALERT_SINKS]
+        _ENGINE = AlertEngine(dispatcher=AlertDispatcher(sinks) if sinks else None)
+    return _ENGINE
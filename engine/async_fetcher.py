@@ -0,0 +1,248 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+
+from config import MAX_RETRIES
+from engine.candle_store import STORE, frame_from_response, to_epoch
+from engine.data_fetcher import URL, TOKEN, build_payload, window_start
+from engine.metrics import METRICS
+from engine.rate_limiter import (
+    LIMITER, CONTROLLER, is_retryable, retry_after, retry_delay
+)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+class FetchResult(dict):
+    """
+    {str(security_id): DataFrame} plus .failed = {str(security_id): reason}.
+    Failed symbols still map to whatever the candle store already had,
+    so a throttled refresh degrades to stale data instead of dropping them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failed = {}
+
+    def __repr__(self):
+        # asyncio formats a finished task's result when it closes the loop;
+        # dict's repr would render every frame in the universe
+        return f"<FetchResult {len(self)} symbols, {len(self.failed)} failed>"
+
+
+# =========================================================
+# ONE SYMBOL (runs inside the shared client)
+# =========================================================
+def _tracer():
+    """httpcore trace hook recording when each connection / HTTP phase ends."""
+    marks = {}
+
+    async def trace(event, info):
+        marks[event.split(".", 1)[-1]] = time.perf_counter()
+
+    return marks, trace
+
+
+def _observe_phases(marks):
+    # connect = TCP (+TLS) setup on a fresh connection; server = request
+    # sent -> response headers (Dhan think time); download = body transfer
+    if "connect_tcp.complete" in marks:
+        done = marks.get("start_tls.complete", marks["connect_tcp.complete"])
+        METRICS.observe("fetch.connect", done - marks["connect_tcp.started"])
+    sent = marks.get("send_request_body.complete")
+    headers = marks.get("receive_response_headers.complete")
+    if sent and headers:
+        METRICS.observe("fetch.server", headers - sent)
+        body = marks.get("receive_response_body.complete")
+        if body:
+            METRICS.observe("fetch.download", body - headers)
+
+
+async def _post(client, gate, payload):
+    """Rate-limited POST with jittered retries. Returns (response, error)."""
+    error = None
+    for attempt in range(MAX_RETRIES + 1):
+        resp = None
+        queued = time.perf_counter()
+        async with gate.slot():
+            await LIMITER.acquire_async()
+            start = time.perf_counter()
+            METRICS.observe("fetch.queue_wait", start - queued)
+            marks, trace = _tracer()
+            try:
+                resp = await client.post(URL, json=payload,
+                                         extensions={"trace": trace})
+            except httpx.HTTPError as e:
+                CONTROLLER.on_error()
+                error = type(e).__name__
+            else:
+                METRICS.observe("fetch.request", time.perf_counter() - start)
+                _observe_phases(marks)
+                if resp.status_code == 200:
+                    CONTROLLER.on_success(time.perf_counter() - start)
+                    return resp, None
+                error = f"HTTP {resp.status_code}"
+                if not is_retryable(resp.status_code):
+                    return resp, error
+                if resp.status_code == 429:
+                    CONTROLLER.on_throttle()
+                else:
+                    CONTROLLER.on_error()
+
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(retry_delay(attempt, retry_after(resp)))
+
+    return None, error
+
+
+async def _fetch_one(client, gate, security_id, interval, window_start, to_date):
+    since = to_epoch(window_start)
+    fetch_from = STORE.fetch_start(security_id, interval, window_start)
+    payload = build_payload(security_id, interval, fetch_from, to_date)
+
+    resp, error = await _post(client, gate, payload)
+
+    if not error:
+        # CPU + disk work goes to a worker thread so the loop keeps requests flowing
+        try:
+            candles = await asyncio.get_running_loop().run_in_executor(
+                None, _decode_and_store, security_id, interval, resp, since
+            )
+            return str(security_id), candles, None
+        except Exception as e:
+            # Malformed 200 body or failed store write: one symbol, not the scan
+            error = f"{type(e).__name__}: {e}"
+
+    stale = STORE.load(security_id, interval, since=since)
+    return str(security_id), stale, error
+
+
+def _decode_and_store(security_id, interval, resp, since):
+    with METRICS.timer("decode.json"):
+        body = resp.json()
+    with METRICS.timer("decode.frame"):
+        fresh = frame_from_response(body)
+    with METRICS.timer("store.append"):
+        return STORE.append(security_id, interval, fresh, since=since)
+
+
+async def _fetch_all(security_ids, interval, window_start, to_date,
+                     on_chunk=None, chunk_size=None, concurrency=None):
+    limits = httpx.Limits(
+        max_connections=CONTROLLER.max_limit,
+        max_keepalive_connections=CONTROLLER.max_limit
+    )
+    headers = {"access-token": TOKEN or "", "Content-Type": "application/json"}
+
+    async with httpx.AsyncClient(
+        headers=headers, limits=limits, http2=HTTP2, timeout=10
+    ) as client:
+        gate = CONTROLLER.gate(cap=concurrency)
+        tasks = [
+            _fetch_one(client, gate, sid, interval, window_start, to_date)
+            for sid in security_ids
+        ]
+
+        result = FetchResult()
+        chunk = FetchResult()
+        for task in asyncio.as_completed(tasks):
+            sid, candles, error = await task
+            result[sid] = chunk[sid] = candles
+            if error:
+                result.failed[sid] = chunk.failed[sid] = error
+
+            # Hand finished symbols downstream while the rest are in flight
+            if on_chunk and len(chunk) >= chunk_size:
+                on_chunk(chunk)
+                chunk = FetchResult()
+
+        if on_chunk and chunk:
+            on_chunk(chunk)
+
+    if result.failed:
+        print(f"[WARN] {len(result.failed)}/{len(result)} symbols failed to refresh "
+              f"(serving cached candles)")
+    return result
+
+
+def _run(coro):
+    # Streamlit / Jupyter may already own an event loop on this thread
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(1) as exe:
+        return exe.submit(asyncio.run, coro).result()
+
+
+def _window(lookback_days):
+    start = window_start(lookback_days)
+    if lookback_days is None:
+        return start, start.strftime("%Y-%m-%d")
+    return start, datetime.now().strftime("%Y-%m-%d")
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+def fetch_many(security_ids, interval=5, lookback_days=None, concurrency=None):
+    """
+    Fetch candles for many symbols over one pooled (keep-alive, HTTP/2 when
+    available) connection set, within the shared Dhan request budget.
+    Returns a FetchResult; see its docstring for failure handling.
+
+    concurrency=None lets the adaptive controller pick the in-flight limit;
+    an explicit value caps this call below it, leaving the limit the
+    controller has learned untouched.
+
+    lookback_days=None -> last trading session only (engine semantics),
+    otherwise a rolling window of that many calendar days.
+    """
+    window_start, to_date = _window(lookback_days)
+
+    security_ids = list(dict.fromkeys(security_ids))
+    if not security_ids:
+        return FetchResult()
+
+    return _run(_fetch_all(security_ids, interval, window_start, to_date,
+                           concurrency=concurrency))
+
+
+def fetch_stream(security_ids, chunk_size, interval=5, lookback_days=None):
+    """
+    Same fetch as fetch_many, but yields FetchResult chunks of roughly
+    chunk_size symbols in completion order while the rest are still in
+    flight, so callers can overlap compute with network I/O.
+    """
+    window_start, to_date = _window(lookback_days)
+    security_ids = list(dict.fromkeys(security_ids))
+    chunks = queue.Queue()
+    done = object()
+
+    def produce():
+        try:
+            asyncio.run(_fetch_all(
+                security_ids, interval, window_start, to_date,
+                on_chunk=chunks.put, chunk_size=max(1, chunk_size)
+            ))
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while (item := chunks.get()) is not done:
+        if isinstance(item, Exception):
+            raise item
+        yield item
@@ -0,0 +1,217 @@
+import fcntl
+import os
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from config import CANDLE_STORE_DIR, CANDLE_STORE_RETENTION_DAYS
+
+IST = timezone(timedelta(hours=5, minutes=30))
+IST_SECONDS = 19800
+
+# One row per candle, timestamp = Dhan epoch seconds (bar open)
+CANDLE_DTYPE = np.dtype([
+    ("timestamp", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+COLUMNS = list(CANDLE_DTYPE.names)
+
+# Bars are trimmed to retention only once they are this far past it, so
+# the full-file rewrite happens about once a day per file, not per append
+TRIM_SLACK_SECONDS = 86400
+
+
+# =========================================================
+# DHAN RESPONSE -> CANDLE FRAME
+# =========================================================
+def frame_from_response(d):
+    if not d or "close" not in d:
+        return pd.DataFrame(columns=COLUMNS)
+
+    df = pd.DataFrame({
+        "timestamp": d.get("timestamp", []),
+        "open": d.get("open", []),
+        "high": d.get("high", []),
+        "low": d.get("low", []),
+        "close": d.get("close", []),
+        "volume": d.get("volume", [])
+    }).dropna()
+
+    df["timestamp"] = df["timestamp"].astype("int64")
+    return df.reset_index(drop=True)
+
+
+def to_epoch(dt):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=IST)
+    return int(dt.timestamp())
+
+
+def from_epoch(ts):
+    return datetime.fromtimestamp(int(ts), IST).replace(tzinfo=None)
+
+
+def session_day(ts):
+    """IST calendar day number of epoch seconds (scalar or int64 array)."""
+    return (ts + IST_SECONDS) // 86400
+
+
+# =========================================================
+# CANDLE STORE
+# =========================================================
+class CandleStore:
+    """
+    On-disk candle cache, one file of raw CANDLE_DTYPE records per
+    (security_id, interval); the row count is the file size. Files are
+    memory-mapped on read, so a cold dashboard start only pays for the
+    tail that Dhan has not sent yet, and append() writes only the rows it
+    changes (see its docstring).
+    """
+
+    def __init__(self, root=CANDLE_STORE_DIR,
+                 retention_days=CANDLE_STORE_RETENTION_DAYS):
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, security_id, interval):
+        return os.path.join(self.root, f"{security_id}_{interval}m.candles")
+
+    def _read(self, security_id, interval):
+        path = self._path(security_id, interval)
+        try:
+            # A torn trailing record (crash mid-write) is not counted
+            rows = os.path.getsize(path) // CANDLE_DTYPE.itemsize
+        except OSError:
+            rows = 0
+        if not rows:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode="r", shape=(rows,))
+
+    def last_timestamp(self, security_id, interval):
+        arr = self._read(security_id, interval)
+        return int(arr["timestamp"][-1]) if len(arr) else None
+
+    def last_close(self, security_id, interval):
+        arr = self._read(security_id, interval)
+        return float(arr["close"][-1]) if len(arr) else float("nan")
+
+    def load(self, security_id, interval, since=None, until=None):
+        """Stored candles with since <= timestamp <= until (either may be None)."""
+        arr = self._read(security_id, interval)
+        if len(arr):
+            start = 0 if since is None else \
+                np.searchsorted(arr["timestamp"], since, side="left")
+            end = len(arr) if until is None else \
+                np.searchsorted(arr["timestamp"], until, side="right")
+            arr = arr[start:end]
+        return pd.DataFrame(np.asarray(arr))
+
+    def fetch_start(self, security_id, interval, window_start):
+        """
+        First datetime that still has to be requested from Dhan.
+        The last stored bar is re-requested because it may still be forming.
+        """
+        last_ts = self.last_timestamp(security_id, interval)
+        if last_ts is None or last_ts < to_epoch(window_start):
+            return window_start
+        return from_epoch(last_ts)
+
+    def append(self, security_id, interval, fresh, since=None):
+        """
+        Merge fresh bars into the store and return the stored candles
+        (timestamp >= since). Stored bars from the first fresh timestamp on
+        are overwritten in place and the rest appended, so a refresh writes
+        only its own rows. The whole file is rewritten (tmp + os.replace)
+        only to trim bars past retention or when the merge would shrink it;
+        files never shrink in place, so readers' maps stay valid.
+        """
+        if fresh.empty:
+            return self.load(security_id, interval, since=since)
+
+        new = np.empty(len(fresh), dtype=CANDLE_DTYPE)
+        for col in COLUMNS:
+            new[col] = fresh[col].to_numpy()
+        new = new[np.argsort(new["timestamp"], kind="stable")]
+
+        # Drop duplicate timestamps inside the fresh batch (keep last)
+        ts = new["timestamp"]
+        new = new[np.append(ts[1:] != ts[:-1], True)]
+
+        path = self._path(security_id, interval)
+        with self._locked(path) as fd:
+            old = self._read(security_id, interval)
+            keep = int(np.searchsorted(old["timestamp"], new["timestamp"][0], side="left"))
+            rows = keep + len(new)
+
+            cutoff = None
+            if self.retention_days:
+                cutoff = new["timestamp"][-1] - self.retention_days * 86400
+            expired = cutoff is not None and len(old) and \
+                old["timestamp"][0] < cutoff - TRIM_SLACK_SECONDS
+
+            if expired or rows < len(old):
+                merged = np.concatenate([np.asarray(old[:keep]), new])
+                if cutoff is not None:
+                    merged = merged[merged["timestamp"] >= cutoff]
+                del old   # release the map before replacing the file
+                tmp = f"{path}.{os.getpid()}.tmp"
+                merged.tofile(tmp)
+                os.replace(tmp, path)
+            else:
+                del old
+                os.pwrite(fd, new.tobytes(), keep * CANDLE_DTYPE.itemsize)
+                if os.fstat(fd).st_size > rows * CANDLE_DTYPE.itemsize:
+                    # Only a torn trailing record can lie past the last row
+                    os.ftruncate(fd, rows * CANDLE_DTYPE.itemsize)
+
+        return self.load(security_id, interval, since=since)
+
+    @contextmanager
+    def _locked(self, path):
+        # One writer per file (daemon + in-process scans + tick feed); a
+        # writer that waited across a rewrite retries on the new file
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+        try:
+            yield fd
+        finally:
+            os.close(fd)   # releases the lock
+
+
+STORE = CandleStore()
+
+
+# =========================================================
+# HANDLES (results point into the store instead of carrying frames)
+# =========================================================
+def candle_handle(security_id, interval, ohlc):
+    """Scalar fields identifying the candles a result was computed from."""
+    ts = ohlc["timestamp"]
+    return {
+        "security_id": str(security_id),
+        "interval": interval,
+        "first_ts": int(ts.iat[0]),
+        "last_ts": int(ts.iat[-1]),
+    }
+
+
+def load_handle(result, store=None):
+    """Materialize a result's candles from the store on demand."""
+    return (store or STORE).load(
+        result["security_id"], result["interval"],
+        since=result.get("first_ts"), until=result.get("last_ts")
+    )
@@ -1,39 +1,67 @@
 import requests, os, pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from engine.market_calendar import last_trading_day
+from engine.candle_store import STORE, frame_from_response, to_epoch
+from engine.rate_limiter import post_with_retry
+from engine.metrics import METRICS
+from config import DHAN_BASE_URL
 
 load_dotenv()
 
-URL = "https://api.dhan.co/v2/charts/intraday"
+BASE_URL = os.getenv("DHAN_BASE_URL", DHAN_BASE_URL).rstrip("/")
+URL = f"{BASE_URL}/v2/charts/intraday"
 TOKEN = os.getenv("DHAN_ACCESS_TOKEN")
 
-def get_ohlc(security_id, interval=5):
-    trade_date = last_trading_day()
+# Keep-alive pool shared by every call in this process
+SESSION = requests.Session()
+
+
+def session_start():
+    return datetime.strptime(last_trading_day(), "%Y-%m-%d")
+
 
-    payload = {
+def window_start(lookback_days=None):
+    """Start of the candle window: the last session, or N calendar days back."""
+    if lookback_days is None:
+        return session_start()
+    return (datetime.now() - timedelta(days=lookback_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def build_payload(security_id, interval, fetch_from, to_date):
+    return {
         "securityId": str(security_id),
         "exchangeSegment": "NSE_EQ",
         "instrument": "EQUITY",
         "interval": interval,
-        "fromDate": trade_date,
-        "toDate": trade_date
+        "fromDate": fetch_from.strftime("%Y-%m-%d %H:%M:%S"),
+        "toDate": to_date
     }
 
-    r = requests.post(URL, json=payload, headers={"access-token": TOKEN})
 
-    if r.status_code != 200:
-        return pd.DataFrame()
+def get_ohlc(security_id, interval=5):
+    start = session_start()
+
+    # Only ask Dhan for bars after the last one already on disk
+    fetch_from = STORE.fetch_start(security_id, interval, start)
+    payload = build_payload(
+        security_id, interval, fetch_from, start.strftime("%Y-%m-%d")
+    )
 
-    d = r.json()
+    r = post_with_retry(
+        SESSION, URL, json=payload, headers={"access-token": TOKEN or ""}, timeout=10
+    )
 
-    if not d or "close" not in d:
-        return pd.DataFrame()
+    if r is None or r.status_code != 200:
+        # Keep the symbol in the scan with whatever is cached
+        print(f"[WARN] {security_id} → {r.status_code if r is not None else 'no response'}")
+        return STORE.load(security_id, interval, since=to_epoch(start))
 
-    return pd.DataFrame({
-        "open": d["open"],
-        "high": d["high"],
-        "low": d["low"],
-        "close": d["close"],
-        "volume": d["volume"]
-    })
+    with METRICS.timer("decode.json"):
+        body = r.json()
+    with METRICS.timer("decode.frame"):
+        fresh = frame_from_response(body)
+    with METRICS.timer("store.append"):
+        return STORE.append(security_id, interval, fresh, since=to_epoch(start))
@@ -0,0 +1,199 @@
+"""
+User-defined screens over the dashboard results table.
+
+A filter set is a name plus rules ANDed together; each rule compares one
+column with a value:
+
+    {"name": "Momentum", "rules": [
+        {"column": "RSI", "op": ">=", "value": 60},
+        {"column": "VWAP Dist %", "op": ">", "value": 0},
+        {"column": "Bucket", "op": "in", "value": ["Bullish", "Overbought"]}
+    ]}
+
+Sets persist as JSON in FILTER_SETS_FILE. FilterSets compiles them into
+column-wise NumPy comparisons: every distinct rule is evaluated once per
+table and shared by all sets that use it, so a dozen screens cost about
+one pass over the table plus an AND per set.
+"""
+import copy
+import json
+import os
+
+import numpy as np
+
+from config import FILTER_SETS_FILE
+
+NUMERIC = ("Price", "RSI", "ADX", "VWAP Dist %", "Volume")
+BOOLEAN = ("Volume Spike",)
+CATEGORICAL = ("Bucket", "RSI Signal")
+COLUMNS = NUMERIC + BOOLEAN + CATEGORICAL
+
+COMPARE = {
+    ">=": np.greater_equal, "<=": np.less_equal,
+    ">": np.greater, "<": np.less,
+    "==": np.equal, "!=": np.not_equal,
+}
+MEMBERSHIP = ("in", "not in")
+OPS = tuple(COMPARE) + MEMBERSHIP
+
+DEFAULT_SETS = [
+    {"name": "Filter Set 1", "rules": [
+        {"column": "Price", "op": ">=", "value": 100},
+        {"column": "Price", "op": "<=", "value": 500},
+        {"column": "Volume", "op": ">=", "value": 10_000},
+    ]},
+    {"name": "Filter Set 2", "rules": [
+        {"column": "Price", "op": ">=", "value": 500},
+        {"column": "Price", "op": "<=", "value": 2000},
+        {"column": "Volume", "op": ">=", "value": 50_000},
+    ]},
+]
+
+
+# =========================================================
+# PERSISTENCE
+# =========================================================
+def load_filter_sets(path=FILTER_SETS_FILE):
+    """Saved sets, or DEFAULT_SETS when nothing has been saved yet."""
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULT_SETS)
+    with open(path) as fh:
+        return json.load(fh)["sets"]
+
+
+def save_filter_sets(sets, path=FILTER_SETS_FILE):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"sets": sets}, fh, indent=2)
+    os.replace(tmp, path)
+
+
+# =========================================================
+# EDITOR ROWS (one rule per row: Set, Column, Op, Value)
+# =========================================================
+def to_rows(sets):
+    return [
+        {"Set": s["name"], "Column": r["column"], "Op": r["op"],
+         "Value": ", ".join(map(str, r["value"])) if isinstance(r["value"], list)
+         else str(r["value"])}
+        for s in sets for r in s["rules"]
+    ]
+
+
+def from_rows(rows):
+    """Group editor rows back into sets, in first-seen order; blank rows dropped."""
+    sets = {}
+    for row in rows:
+        name, column, op = (row.get(k) for k in ("Set", "Column", "Op"))
+        # Editor cells left empty come back as None / NaN
+        if not isinstance(name, str) or not name.strip() or not isinstance(column, str):
+            continue
+        sets.setdefault(name.strip(), []).append(
+            {"column": column, "op": op if isinstance(op, str) else "==",
+             "value": row.get("Value")}
+        )
+    return [{"name": name, "rules": rules} for name, rules in sets.items()]
+
+
+# =========================================================
+# COMPILED SETS
+# =========================================================
+def _normalize(rule):
+    column, op, value = rule["column"], rule["op"], rule["value"]
+    if column not in COLUMNS:
+        raise ValueError(f"unknown column {column!r}")
+    if op not in OPS:
+        raise ValueError(f"unknown operator {op!r}")
+
+    if op in MEMBERSHIP:
+        if isinstance(value, str):
+            value = [v.strip() for v in value.split(",") if v.strip()]
+        if column in NUMERIC:
+            value = [float(v) for v in value]
+        return column, op, tuple(value)
+
+    if column in NUMERIC:
+        return column, op, float(value)
+    if column in BOOLEAN:
+        return column, op, str(value).strip().lower() in ("1", "true", "yes", "✅")
+    return column, op, str(value)
+
+
+class FilterSets:
+    """Sets compiled to shared column comparisons; evaluate() masks them all at once."""
+
+    def __init__(self, sets):
+        self.atoms = {}      # (column, op, value) -> row in the atom mask matrix
+        self.members = {}    # set name -> atom rows ANDed together
+        for s in sets:
+            idx = []
+            for rule in s["rules"]:
+                atom = _normalize(rule)
+                idx.append(self.atoms.setdefault(atom, len(self.atoms)))
+            self.members[s["name"]] = idx
+        self._last = (None, None)
+
+    @property
+    def names(self):
+        return list(self.members)
+
+    def specs(self):
+        """Normalized sets, JSON-ready (what save_filter_sets stores)."""
+        atoms = list(self.atoms)
+        return [
+            {"name": name, "rules": [
+                {"column": c, "op": op, "value": list(v) if isinstance(v, tuple) else v}
+                for c, op, v in (atoms[i] for i in idx)
+            ]}
+            for name, idx in self.members.items()
+        ]
+
+    def signature(self, name):
+        """Hashable identity of one set's rules (changes when they are edited)."""
+        atoms = list(self.atoms)
+        return frozenset(atoms[i] for i in self.members[name])
+
+    def evaluate(self, table):
+        """{set name: bool array over table rows}; cached for the last table."""
+        if self._last[0] is table:
+            return self._last[1]
+
+        n = len(table)
+        hits = np.empty((len(self.atoms), n), dtype=bool)
+        for (column, op, value), i in self.atoms.items():
+            x = table[column].to_numpy()
+            if op in MEMBERSHIP:
+                hits[i] = np.isin(x, value) ^ (op == "not in")
+            else:
+                hits[i] = COMPARE[op](x, value)
+
+        masks = {
+            name: hits[idx].all(axis=0) if idx else np.ones(n, dtype=bool)
+            for name, idx in self.members.items()
+        }
+        self._last = (table, masks)
+        return masks
+
+    def mask_fn(self, name):
+        return lambda table: self.evaluate(table)[name]
+
+    def price_ranges(self):
+        """
+        [(min, max)] Price bounds per set for the scan prefilter, or None
+        when some set has no upper bound (the scan must cover everything).
+        """
+        ranges = []
+        atoms = list(self.atoms)
+        for idx in self.members.values():
+            lo, hi = 0.0, None
+            for column, op, value in (atoms[i] for i in idx):
+                if column != "Price":
+                    continue
+                if op in (">=", ">", "=="):
+                    lo = max(lo, value)
+                if op in ("<=", "<", "=="):
+                    hi = value if hi is None else min(hi, value)
+            if hi is None:
+                return None
+            ranges.append((lo, hi))
+        return ranges
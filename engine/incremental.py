@@ -0,0 +1,363 @@
+import copy
+import math
+from collections import deque
+
+import numpy as np
+
+from config import RSI_PERIOD, RSI_MODE
+from engine.candle_store import session_day
+
+NAN = float("nan")
+
+
+# =========================================================
+# BUILDING BLOCKS
+# =========================================================
+class RollingMean:
+    """O(1) equivalent of Series.rolling(period).mean() (NaN poisons the window)."""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    def update(self, x):
+        self.window.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+
+        if len(self.window) < self.period or self.nans:
+            return NAN
+        return self.total / self.period
+
+
+class EMA:
+    """O(1) equivalent of Series.ewm(span=period, adjust=False).mean()."""
+
+    def __init__(self, period):
+        self.alpha = 2 / (period + 1)
+        self.value = NAN
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = x
+        elif not math.isnan(x):
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+def _div(a, b):
+    # pandas semantics: x/0 -> ±inf, 0/0 and NaN -> NaN (no ZeroDivisionError)
+    if b == 0:
+        return NAN if (a == 0 or math.isnan(a)) else math.copysign(math.inf, a)
+    return a / b
+
+
+def _true_range(high, low, prev_close):
+    if math.isnan(prev_close):
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+# =========================================================
+# INDICATORS (mirror engine/indicators.py bar for bar)
+# =========================================================
+class IncrementalRSI:
+    """Same recurrence as indicators.rsi_array (SMA-seeded Wilder / EMA, or SMA)."""
+
+    def __init__(self, period=RSI_PERIOD, mode=RSI_MODE):
+        self.period = period
+        self.mode = mode
+        self.alpha = 1 / period if mode == "wilder" else 2 / (period + 1)
+        self.gain = RollingMean(period)
+        self.loss = RollingMean(period)
+        self.count = 0
+        self.avg_gain = NAN
+        self.avg_loss = NAN
+        self.prev_close = NAN
+        self.value = NAN
+        self.prev_value = NAN
+
+    def update(self, close):
+        delta = close - self.prev_close
+        self.prev_close = close
+        self.prev_value = self.value
+
+        if math.isnan(delta):
+            self.value = NAN
+            return self.value
+
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.count += 1
+
+        if self.mode == "sma" or self.count <= self.period:
+            self.avg_gain = self.gain.update(gain)
+            self.avg_loss = self.loss.update(loss)
+        else:
+            self.avg_gain += self.alpha * (gain - self.avg_gain)
+            self.avg_loss += self.alpha * (loss - self.avg_loss)
+
+        if self.count < self.period:
+            self.value = NAN
+        elif self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else NAN
+        else:
+            self.value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return self.value
+
+
+class IncrementalMACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal_ema = EMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def update(self, close):
+        self.macd = self.fast.update(close) - self.slow.update(close)
+        self.signal = self.signal_ema.update(self.macd)
+        return self.macd, self.signal
+
+
+class IncrementalVWAP:
+    # Re-anchored at every session open, like compute_vwap
+    def __init__(self):
+        self.pv = 0.0
+        self.vol = 0.0
+        self.day = None
+        self.value = NAN
+
+    def update(self, high, low, close, volume, day=None):
+        if day != self.day:
+            self.pv = self.vol = 0.0
+            self.day = day
+        self.pv += (high + low + close) / 3 * volume
+        self.vol += volume
+        self.value = self.pv / self.vol if self.vol else NAN
+        return self.value
+
+
+class IncrementalADX:
+    def __init__(self, period=14):
+        self.atr = RollingMean(period)
+        self.plus_dm = RollingMean(period)
+        self.minus_dm = RollingMean(period)
+        self.dx = RollingMean(period)
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, high, low, close):
+        up = high - self.prev_high
+        down = self.prev_low - low
+        plus_dm = up if math.isnan(up) else max(up, 0.0)
+        minus_dm = down if math.isnan(down) else max(down, 0.0)
+
+        atr = self.atr.update(_true_range(high, low, self.prev_close))
+        plus_di = 100 * _div(self.plus_dm.update(plus_dm), atr)
+        minus_di = 100 * _div(self.minus_dm.update(minus_dm), atr)
+
+        dx = _div(abs(plus_di - minus_di), plus_di + minus_di) * 100
+        self.value = self.dx.update(dx)
+
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        return self.value
+
+
+class IncrementalSupertrend:
+    def __init__(self, period=10, multiplier=3):
+        self.atr = RollingMean(period)
+        self.multiplier = multiplier
+        self.prev_close = NAN
+        self.up = NAN
+        self.dn = NAN
+        self.trend = 1
+        self.value = NAN
+        self.direction = 0
+
+    def update(self, high, low, close):
+        atr = self.atr.update(_true_range(high, low, self.prev_close))
+        prev_close, self.prev_close = self.prev_close, close
+
+        if math.isnan(atr):
+            self.value, self.direction = NAN, 0
+            return self.value
+
+        hl2 = (high + low) / 2
+        up = hl2 - self.multiplier * atr
+        dn = hl2 + self.multiplier * atr
+
+        if math.isnan(self.up):
+            up1, dn1 = up, dn
+        else:
+            up1, dn1 = self.up, self.dn
+            if prev_close > up1:
+                up = max(up, up1)
+            if prev_close < dn1:
+                dn = min(dn, dn1)
+
+        if self.trend == -1 and close > dn1:
+            self.trend = 1
+        elif self.trend == 1 and close < up1:
+            self.trend = -1
+
+        self.up, self.dn = up, dn
+        self.value = up if self.trend == 1 else dn
+        self.direction = self.trend
+        return self.value
+
+
+class IncrementalVolumeSpike:
+    def __init__(self, lookback=5, multiplier=1.2):
+        self.lookback = lookback
+        self.multiplier = multiplier
+        self.window = deque(maxlen=lookback + 5)
+        self.value = False
+
+    def update(self, volume):
+        self.window.append(volume)
+        if len(self.window) < self.lookback + 5:
+            self.value = False
+            return self.value
+
+        vols = list(self.window)
+        baseline = sum(vols[:5]) / 5
+        self.value = any(v > baseline * self.multiplier for v in vols[5:])
+        return self.value
+
+
+# =========================================================
+# PER-SYMBOL STATE
+# =========================================================
+class SymbolState:
+    """
+    All indicators of one symbol. Closed bars are committed with update();
+    the still-forming last bar is evaluated on a throwaway copy so that
+    repeated polls of the same candle never double-count it.
+    """
+
+    def __init__(self):
+        self.ema9 = EMA(9)
+        self.ema26 = EMA(26)
+        self.ema50 = EMA(50)
+        self.rsi = IncrementalRSI()
+        self.macd = IncrementalMACD()
+        self.vwap = IncrementalVWAP()
+        self.adx = IncrementalADX()
+        self.supertrend = IncrementalSupertrend()
+        self.volume_spike = IncrementalVolumeSpike()
+        self.first_ts = None
+        self.last_ts = None
+        self.last_close = NAN
+        self.last_volume = NAN
+        self.bars = 0
+
+    def update(self, ts, o, h, l, c, v):
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self.last_close = c
+        self.last_volume = v
+        self.bars += 1
+
+        self.ema9.update(c)
+        self.ema26.update(c)
+        self.ema50.update(c)
+        self.rsi.update(c)
+        self.macd.update(c)
+        self.vwap.update(h, l, c, v, session_day(ts))
+        self.adx.update(h, l, c)
+        self.supertrend.update(h, l, c)
+        self.volume_spike.update(v)
+
+    def peek(self, ts, o, h, l, c, v):
+        probe = copy.deepcopy(self)
+        probe.update(ts, o, h, l, c, v)
+        return probe.snapshot()
+
+    def snapshot(self):
+        return {
+            "rsi": self.rsi.value,
+            "rsi_prev": self.rsi.prev_value,
+            "ema9": self.ema9.value,
+            "ema26": self.ema26.value,
+            "ema50": self.ema50.value,
+            "vwap": self.vwap.value,
+            "macd": self.macd.macd,
+            "macd_signal": self.macd.signal,
+            "adx": self.adx.value,
+            "supertrend": self.supertrend.value,
+            "supertrend_dir": self.supertrend.direction,
+            "volume_spike": self.volume_spike.value,
+            "close": self.last_close,
+            "volume": self.last_volume,
+            "last_ts": self.last_ts,
+            "bars": self.bars,
+        }
+
+    @classmethod
+    def warm(cls, candles):
+        """Bulk-initialise from history (all bars treated as closed)."""
+        state = cls()
+        cols = [candles[c].to_numpy(dtype=float) for c in
+                ("open", "high", "low", "close", "volume")]
+        for ts, o, h, l, c, v in zip(candles["timestamp"].to_numpy(), *cols):
+            state.update(int(ts), o, h, l, c, v)
+        return state
+
+
+class IndicatorStates:
+    """
+    Registry of SymbolState per security_id. sync() feeds only bars the
+    state has not seen yet, so a refresh costs O(new bars) per symbol.
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def sync(self, security_id, candles):
+        if candles is None or candles.empty:
+            return None
+
+        ts = candles["timestamp"].to_numpy()
+        state = self.states.get(security_id)
+
+        # New session / trimmed window / gap -> rebuild from history
+        if (state is None or state.first_ts != int(ts[0])
+                or state.last_ts is None
+                or not np.any(ts == state.last_ts)):
+            state = SymbolState.warm(candles.iloc[:-1])
+            self.states[security_id] = state
+
+        start = int(np.searchsorted(ts, state.last_ts, side="right")) \
+            if state.last_ts is not None else 0
+
+        # Commit everything newer except the forming bar
+        rows = candles.iloc[start:]
+        for bar in rows.iloc[:-1].itertuples(index=False):
+            state.update(int(bar.timestamp), bar.open, bar.high,
+                         bar.low, bar.close, bar.volume)
+
+        last = candles.iloc[-1]
+        if state.last_ts == int(ts[-1]):
+            return state.snapshot()
+        return state.peek(int(last["timestamp"]), last["open"], last["high"],
+                          last["low"], last["close"], last["volume"])
+
+    def drop(self, security_id):
+        self.states.pop(security_id, None)
+
+
+STATES = IndicatorStates()
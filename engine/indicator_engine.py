@@ -1,59 +1,181 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from engine.data_fetcher import get_ohlc
+import pandas as pd
+
+from config import ENGINE_MODE, INTERVAL, TIMEFRAMES, RSI_PERIOD
+from engine.async_fetcher import fetch_many
+from engine.candle_store import candle_handle
+from engine.incremental import STATES
+from engine.metrics import METRICS
+from engine.panel import build_panel, compute_panel, compute_trend_panel
+from engine.process_engine import run_pipelined
+from engine.resample import derive, feed_interval
 from engine.indicators import (
-    compute_rsi, compute_vwap, compute_macd,
+    rsi_array, compute_vwap, compute_macd,
     compute_ema, compute_adx, compute_supertrend,
     volume_spike
 )
 
-def process_symbol(row):
-    ohlc = get_ohlc(row.SECURITY_ID)
-    if ohlc.empty or len(ohlc) < 30:
-        return None
+TIMEFRAME_SUFFIXES = tuple(f"_{m}m" for m in TIMEFRAMES)
 
+def compute_indicators(ohlc):
     close = ohlc["close"]
+    timer = METRICS.timer
+
+    with timer("indicator.rsi"):
+        rsi = rsi_array(close.to_numpy(dtype=float), last=2)
+    with timer("indicator.ema"):
+        ema9 = compute_ema(close, 9).iloc[-1]
+        ema26 = compute_ema(close, 26).iloc[-1]
+        ema50 = compute_ema(close, 50).iloc[-1]
+    with timer("indicator.vwap"):
+        vwap = compute_vwap(ohlc).iloc[-1]
+    with timer("indicator.macd"):
+        macd, signal = compute_macd(close)
+    with timer("indicator.adx"):
+        adx = compute_adx(ohlc).iloc[-1]
+    with timer("indicator.supertrend"):
+        st, st_dir = compute_supertrend(ohlc)
+    with timer("indicator.volume_spike"):
+        spike = volume_spike(ohlc["volume"])
+
+    return {
+        "rsi": rsi[-1],
+        "rsi_prev": rsi[-2] if len(rsi) > 1 else float("nan"),
+        "ema9": ema9,
+        "ema26": ema26,
+        "ema50": ema50,
+        "vwap": vwap,
+        "macd": macd.iloc[-1],
+        "macd_signal": signal.iloc[-1],
+        "adx": adx,
+        "supertrend": st.iloc[-1],
+        "supertrend_dir": int(st_dir.iloc[-1]),
+        "volume_spike": spike,
+        "close": close.iloc[-1],
+        "volume": ohlc["volume"].iloc[-1],
+        "last_ts": int(ohlc["timestamp"].iloc[-1]) if "timestamp" in ohlc else 0,
+        "bars": len(ohlc),
+    }
 
-    ema9 = compute_ema(close, 9).iloc[-1]
-    ema26 = compute_ema(close, 26).iloc[-1]
-    ema50 = compute_ema(close, 50).iloc[-1]
 
-    rsi = compute_rsi(close).iloc[-1]
-    vwap = compute_vwap(ohlc).iloc[-1]
-    macd, signal = compute_macd(close)
-    adx = compute_adx(ohlc).iloc[-1]
-    st = compute_supertrend(ohlc).iloc[-1]
+def symbol_indicators(security_id, ohlc, min_bars=30):
+    if ohlc is None or ohlc.empty or len(ohlc) < min_bars:
+        return None
+
+    if ENGINE_MODE == "incremental":
+        # O(new bars) per refresh; matches compute_indicators bar for bar
+        with METRICS.timer("indicator.incremental"):
+            return STATES.sync(str(security_id), ohlc)
+    return compute_indicators(ohlc)
+
+
+def process_symbol(row, ohlc):
+    ind = symbol_indicators(row.SECURITY_ID, ohlc)
+    if ind is None:
+        return None
+    return build_result(row, ind, ohlc)
 
-    vol_spike = volume_spike(ohlc["volume"])
 
+def build_result(row, ind, ohlc, interval=INTERVAL):
+    # Scalars only: candles stay in the store, see candle_store.load_handle
     return {
+        **candle_handle(row.SECURITY_ID, interval, ohlc),
         "company": row.NAME_OF_COMPANY,
         "symbol": row.SYMBOL,
-        "ltp": row.LTP,
-        "rsi": round(rsi, 1),
-        "ema9": round(ema9, 2),
-        "ema26": round(ema26, 2),
-        "ema50": round(ema50, 2),
-        "vwap": round(vwap, 2),
-        "macd": round(macd.iloc[-1], 2),
-        "adx": round(adx, 1),
-        "supertrend": st,
-        "volume_spike": vol_spike,
-        "ohlc": ohlc
+        # Last bar close, as in scanner results (not the stocks.csv LTP)
+        "ltp": ind["close"],
+        "close": ind["close"],
+        "rsi": round(ind["rsi"], 1),
+        "ema9": round(ind["ema9"], 2),
+        "ema26": round(ind["ema26"], 2),
+        "ema50": round(ind["ema50"], 2),
+        "vwap": round(ind["vwap"], 2),
+        "macd": round(ind["macd"], 2),
+        "adx": round(ind["adx"], 1),
+        "supertrend": ind["supertrend"],
+        "supertrend_dir": ind["supertrend_dir"],
+        "volume_spike": ind["volume_spike"],
+        "volume": ind["volume"],
+        # Extra TIMEFRAMES (rsi_15m, ...), when computed
+        **{k: v for k, v in ind.items() if k.endswith(TIMEFRAME_SUFFIXES)},
     }
 
 
-def run_indicator_engine(symbols_df, workers=10):
-    results = []
+def timeframe_indicators(fed, feed, timeframes, interval=INTERVAL):
+    """
+    RSI / EMA / Supertrend per extra timeframe, derived from the feed
+    candles already fetched (no extra Dhan requests). Columns are
+    suffixed with the timeframe: rsi_15m, supertrend_dir_60m, ...
+    """
+    frames = []
+    for minutes in timeframes:
+        if minutes == interval or minutes % feed:
+            continue
+        # Longer bars need more than one session of history: use the store's
+        with METRICS.timer("indicator.resample"):
+            bars = derive(fed, minutes, feed, history=True)
+        with METRICS.timer("indicator.build_panel"):
+            panel = build_panel(bars, min_bars=RSI_PERIOD + 1)
+        frames.append(compute_trend_panel(panel).add_suffix(f"_{minutes}m"))
+    return frames
+
+
+def compute_universe(security_ids, workers=None, min_bars=30,
+                     interval=INTERVAL, lookback_days=None, timeframes=TIMEFRAMES):
+    """
+    Fetch + indicators for many symbols using ENGINE_MODE.
+    Candles are fetched once at FEED_INTERVAL; `interval` bars and every
+    extra timeframe are resampled from them (engine/resample.py).
+    Returns (FetchResult of `interval` candles, indicator frame indexed
+    by str security_id).
+    """
+    feed = feed_interval(interval)
+
+    if ENGINE_MODE == "process":
+        # Fetch and compute overlap; compute spread across all cores
+        fed, candles, ind = run_pipelined(
+            security_ids, interval=interval, min_bars=min_bars,
+            lookback_days=lookback_days, feed=feed
+        )
+    else:
+        fed = fetch_many(security_ids, interval=feed, concurrency=workers,
+                         lookback_days=lookback_days)
+        with METRICS.timer("indicator.resample"):
+            candles = derive(fed, interval, feed)
+        ind = _compute_interval(candles, min_bars)
+
+    extra = timeframe_indicators(fed, feed, timeframes, interval)
+    if extra and not ind.empty:
+        ind = ind.join(extra)
+    return candles, ind
+
 
-    with ThreadPoolExecutor(workers) as exe:
-        futures = [
-            exe.submit(process_symbol, row)
-            for row in symbols_df.itertuples(index=False)
-        ]
+def _compute_interval(candles, min_bars):
+    if ENGINE_MODE == "panel":
+        # Whole universe in one (symbols x time) pass
+        with METRICS.timer("indicator.build_panel"):
+            panel = build_panel(candles, min_bars=min_bars)
+        return compute_panel(panel)
 
-        for f in as_completed(futures):
-            r = f.result()
-            if r:
-                results.append(r)
+    # Network: one pooled async batch. Compute: plain loop (GIL-bound anyway)
+    rows = {}
+    for sid, ohlc in candles.items():
+        ind = symbol_indicators(sid, ohlc, min_bars)
+        if ind is not None:
+            rows[sid] = ind
+
+    ind = pd.DataFrame.from_dict(rows, orient="index")
+    ind.index.name = "security_id"
+    return ind
+
+
+def run_indicator_engine(symbols_df, workers=None):
+    candles, ind = compute_universe(symbols_df["SECURITY_ID"], workers)
+    ind = ind.to_dict("index")
+
+    results = []
+    for row in symbols_df.itertuples(index=False):
+        sid = str(row.SECURITY_ID)
+        if sid in ind:
+            results.append(build_result(row, ind[sid], candles[sid]))
 
     return results
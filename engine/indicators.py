@@ -1,6 +1,14 @@
 import pandas as pd
 import numpy as np
 
+from config import RSI_PERIOD, RSI_MODE
+from engine.candle_store import session_day
+
+try:
+    from numba import njit
+except ImportError:  # optional accelerator
+    njit = None
+
 # =========================================================
 # EMA
 # =========================================================
@@ -9,21 +17,180 @@ def compute_ema(series, period):
 
 
 # =========================================================
-# RSI (14)
+# RSI (14) – one engine for Wilder / EMA / SMA smoothing
 # =========================================================
-def compute_rsi(close, period=14):
-    delta = close.diff()
-
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
+RSI_MODES = {"sma": 0, "wilder": 1, "ema": 2}
+SEED_WEIGHT = 1e-8   # Wilder / EMA: residual weight of history dropped by last=K
+
+
+def _rsi_row(close, period, mode, out):
+    # Fused single pass: diff, gain/loss split, smoothing and ratio
+    alpha = 1.0 / period if mode == 1 else 2.0 / (period + 1)
+    count = 0
+    sum_g = 0.0
+    sum_l = 0.0
+    ag = np.nan
+    al = np.nan
+    prev = np.nan
+
+    for i in range(len(close)):
+        c = close[i]
+        if c != c or prev != prev:
+            out[i] = np.nan
+            prev = c
+            if mode == 0:
+                # A gap leaves the SMA window undefined until `period` clean
+                # deltas follow it (as rolling_mean); restart the running sum
+                count = 0
+                sum_g = 0.0
+                sum_l = 0.0
+            continue
 
-    return rsi
+        d = c - prev
+        prev = c
+        g = d if d > 0 else 0.0
+        l = -d if d < 0 else 0.0
+        count += 1
+
+        if mode == 0:
+            sum_g += g
+            sum_l += l
+            if count > period:
+                # Slide the window: drop the delta that just left it
+                # (never NaN: the last `count` deltas are contiguous)
+                old = close[i - period] - close[i - period - 1]
+                sum_g -= old if old > 0 else 0.0
+                sum_l -= -old if old < 0 else 0.0
+            if count >= period:
+                ag = sum_g / period
+                al = sum_l / period
+        elif count <= period:
+            # Seed Wilder / EMA with the SMA of the first `period` deltas
+            sum_g += g
+            sum_l += l
+            if count == period:
+                ag = sum_g / period
+                al = sum_l / period
+        else:
+            ag += alpha * (g - ag)
+            al += alpha * (l - al)
+
+        if count < period:
+            out[i] = np.nan
+        elif al == 0:
+            out[i] = 100.0 if ag > 0 else np.nan
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + ag / al)
+
+
+def _rsi_lists(close, period, mode, out):
+    # Few rows, no numba: plain Python floats beat per-step NumPy overhead
+    for r in range(close.shape[0]):
+        row = [0.0] * close.shape[1]
+        _rsi_row(close[r].tolist(), period, mode, row)
+        out[r] = row
+
+
+def _rsi_numpy(close, period, mode, out):
+    # Pure NumPy for panels: walk time, vectorized across rows (symbols)
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = close[:, 1:] - close[:, :-1]
+    valid = ~np.isnan(delta)
+    gain = np.where(valid, np.clip(delta, 0, None), np.nan)
+    loss = np.where(valid, np.clip(-delta, 0, None), np.nan)
+
+    if mode == 0:
+        ag = rolling_mean(gain, period)
+        al = rolling_mean(loss, period)
+    else:
+        alpha = 1.0 / period if mode == 1 else 2.0 / (period + 1)
+        rows = close.shape[0]
+        count = np.zeros(rows, dtype=np.int64)
+        sum_g = np.zeros(rows)
+        sum_l = np.zeros(rows)
+        g_prev = np.full(rows, np.nan)
+        l_prev = np.full(rows, np.nan)
+        ag = np.full(close.shape, np.nan)
+        al = np.full(close.shape, np.nan)
+
+        for t in range(close.shape[1]):
+            v = valid[:, t]
+            g = np.where(v, gain[:, t], 0.0)
+            l = np.where(v, loss[:, t], 0.0)
+
+            seeding = v & (count < period)
+            sum_g += np.where(seeding, g, 0.0)
+            sum_l += np.where(seeding, l, 0.0)
+            count += seeding
+            seeded = seeding & (count == period)
+            g_prev = np.where(seeded, sum_g / period, g_prev)
+            l_prev = np.where(seeded, sum_l / period, l_prev)
+
+            smooth = v & ~seeding
+            g_prev = np.where(smooth, g_prev + alpha * (g - g_prev), g_prev)
+            l_prev = np.where(smooth, l_prev + alpha * (l - l_prev), l_prev)
+
+            # As _rsi_row: no value on a bar without a delta (gap or the bar after)
+            ready = v & (count >= period)
+            ag[:, t] = np.where(ready, g_prev, np.nan)
+            al[:, t] = np.where(ready, l_prev, np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:] = 100 - (100 / (1 + ag / al))
+
+
+if njit:
+    _rsi_row_jit = njit(cache=True)(_rsi_row)
+
+    @njit(cache=True)
+    def _rsi_jit(close, period, mode, out):
+        for r in range(close.shape[0]):
+            _rsi_row_jit(close[r], period, mode, out[r])
+
+
+def rsi_array(close, period=RSI_PERIOD, mode=RSI_MODE, last=None):
+    """
+    RSI on a raw 1-D (one symbol) or 2-D (symbols x time) array.
+    mode: "wilder" (default), "ema" or "sma". last=K returns only the
+    last K values and reads only the tail they depend on: the SMA window,
+    or for Wilder / EMA enough warm-up bars that the dropped history
+    weighs under SEED_WEIGHT (~250 bars at period 14).
+    """
+    close = np.asarray(close, dtype=float)
+    code = RSI_MODES[mode]
+
+    if last:
+        close = close[..., -(last + _rsi_warmup(period, code)):]
+
+    one_d = close.ndim == 1
+    if one_d:
+        close = close[None, :]
+
+    out = np.empty(close.shape)
+    if njit:
+        _rsi_jit(close, period, code, out)
+    elif close.shape[0] <= 16:
+        _rsi_lists(close, period, code, out)
+    else:
+        _rsi_numpy(close, period, code, out)
+
+    if last:
+        out = out[:, -last:]
+    return out[0] if one_d else out
+
+
+def _rsi_warmup(period, code):
+    if code == 0:
+        return period
+    alpha = 1.0 / period if code == 1 else 2.0 / (period + 1)
+    return period + int(np.ceil(np.log(SEED_WEIGHT) / np.log1p(-alpha)))
+
+
+def compute_rsi(close, period=RSI_PERIOD, mode=RSI_MODE):
+    return pd.Series(
+        rsi_array(close.to_numpy(dtype=float), period, mode),
+        index=close.index
+    )
 
 
 # =========================================================
@@ -31,8 +198,13 @@ def compute_rsi(close, period=14):
 # =========================================================
 def compute_vwap(df):
     tp = (df["high"] + df["low"] + df["close"]) / 3
-    vwap = (tp * df["volume"]).cumsum() / df["volume"].cumsum()
-    return vwap
+    pv = tp * df["volume"]
+    if "timestamp" not in df:
+        return pv.cumsum() / df["volume"].cumsum()
+
+    # Anchored at each session open, however many days of history df holds
+    day = session_day(df["timestamp"].to_numpy(dtype=np.int64))
+    return pv.groupby(day).cumsum() / df["volume"].groupby(day).cumsum()
 
 
 # =========================================================
@@ -79,42 +251,177 @@ def compute_adx(df, period=14):
 
 
 # =========================================================
-# SUPERTREND
+# ROLLING MEAN ON RAW ARRAYS (last axis, NaN poisons window)
 # =========================================================
-def compute_supertrend(df, period=10, multiplier=3):
-    high = df["high"]
-    low = df["low"]
-    close = df["close"]
+def rolling_mean(arr, period):
+    arr = np.asarray(arr, dtype=float)
+    nan = np.isnan(arr)
+    csum = np.cumsum(np.where(nan, 0.0, arr), axis=-1)
+    cnan = np.cumsum(nan, axis=-1)
 
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[-1] < period:
+        return out
 
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(period).mean()
+    pad = np.zeros(arr.shape[:-1] + (1,))
+    csum = np.concatenate([pad, csum], axis=-1)
+    cnan = np.concatenate([pad, cnan], axis=-1)
+
+    window_sum = csum[..., period:] - csum[..., :-period]
+    window_nan = cnan[..., period:] - cnan[..., :-period]
+    out[..., period - 1:] = np.where(window_nan > 0, np.nan, window_sum / period)
+    return out
 
-    hl2 = (high + low) / 2
-    upperband = hl2 + multiplier * atr
-    lowerband = hl2 - multiplier * atr
 
-    supertrend = pd.Series(index=df.index, dtype=float)
-    direction = True  # True = Bullish, False = Bearish
+def true_range(high, low, close):
+    prev_close = np.concatenate(
+        [np.full(close.shape[:-1] + (1,), np.nan), close[..., :-1]], axis=-1
+    )
+    tr = np.fmax(high - low, np.abs(high - prev_close))
+    return np.fmax(tr, np.abs(low - prev_close))
 
-    for i in range(len(df)):
-        if i == 0:
-            supertrend.iloc[i] = upperband.iloc[i]
+
+# =========================================================
+# SUPERTREND
+# =========================================================
+def _supertrend_row(high, low, close, atr, multiplier, st, direction):
+    # Scalar kernel for one symbol; works on lists or (numba) arrays
+    trend = 1
+    up_prev = np.nan
+    dn_prev = np.nan
+    started = False
+
+    for i in range(len(close)):
+        a = atr[i]
+        if a != a:
+            st[i] = np.nan
+            direction[i] = 0
             continue
 
-        if close.iloc[i] > supertrend.iloc[i - 1]:
-            direction = True
-        elif close.iloc[i] < supertrend.iloc[i - 1]:
-            direction = False
+        hl2 = (high[i] + low[i]) / 2
+        up = hl2 - multiplier * a
+        dn = hl2 + multiplier * a
+
+        if started:
+            up1, dn1 = up_prev, dn_prev
+            if close[i - 1] > up1:
+                up = max(up, up1)
+            if close[i - 1] < dn1:
+                dn = min(dn, dn1)
+        else:
+            up1, dn1 = up, dn
+            started = True
+
+        c = close[i]
+        if trend == -1 and c > dn1:
+            trend = 1
+        elif trend == 1 and c < up1:
+            trend = -1
+
+        st[i] = up if trend == 1 else dn
+        direction[i] = trend
+        up_prev, dn_prev = up, dn
+
+
+def _supertrend_numpy(high, low, close, atr, multiplier, st, direction):
+    # Pure NumPy: walk time, vectorized across rows (symbols)
+    rows, n = close.shape
+    trend = np.ones(rows, dtype=np.int8)
+    up_prev = np.full(rows, np.nan)
+    dn_prev = np.full(rows, np.nan)
+    started = np.zeros(rows, dtype=bool)
+    prev_close = np.full(rows, np.nan)
+
+    with np.errstate(invalid="ignore"):
+        for i in range(n):
+            a = atr[:, i]
+            valid = ~np.isnan(a)
+
+            hl2 = (high[:, i] + low[:, i]) / 2
+            up = hl2 - multiplier * a
+            dn = hl2 + multiplier * a
+
+            up1 = np.where(started, up_prev, up)
+            dn1 = np.where(started, dn_prev, dn)
+            up = np.where(started & (prev_close > up1), np.maximum(up, up1), up)
+            dn = np.where(started & (prev_close < dn1), np.minimum(dn, dn1), dn)
+
+            c = close[:, i]
+            flip_up = valid & (trend == -1) & (c > dn1)
+            flip_dn = valid & (trend == 1) & (c < up1)
+            trend = np.where(flip_up, 1, np.where(flip_dn, -1, trend)).astype(np.int8)
+
+            st[:, i] = np.where(valid, np.where(trend == 1, up, dn), np.nan)
+            direction[:, i] = np.where(valid, trend, 0)
+
+            up_prev = np.where(valid, up, up_prev)
+            dn_prev = np.where(valid, dn, dn_prev)
+            started |= valid
+            prev_close = c
+
+
+if njit:
+    _row_jit = njit(cache=True)(_supertrend_row)
+
+    @njit(cache=True)
+    def _supertrend_jit(high, low, close, atr, multiplier, st, direction):
+        for r in range(close.shape[0]):
+            _row_jit(high[r], low[r], close[r], atr[r], multiplier,
+                     st[r], direction[r])
+
+
+def _supertrend_lists(high, low, close, atr, multiplier, st, direction):
+    # Few rows, no numba: plain Python floats beat per-step NumPy overhead
+    for r in range(close.shape[0]):
+        st_r = [0.0] * close.shape[1]
+        dir_r = [0] * close.shape[1]
+        _supertrend_row(high[r].tolist(), low[r].tolist(), close[r].tolist(),
+                        atr[r].tolist(), multiplier, st_r, dir_r)
+        st[r] = st_r
+        direction[r] = dir_r
+
+
+def supertrend_arrays(high, low, close, period=10, multiplier=3):
+    """
+    Supertrend with final-band carry-forward on raw arrays.
+    Accepts 1-D (one symbol) or 2-D (symbols x time) inputs and returns
+    (supertrend, direction) with direction = 1 bullish, -1 bearish,
+    0 during ATR warmup.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    one_d = close.ndim == 1
+    if one_d:
+        high, low, close = high[None, :], low[None, :], close[None, :]
+
+    atr = rolling_mean(true_range(high, low, close), period)
+
+    st = np.empty(close.shape)
+    direction = np.empty(close.shape, dtype=np.int8)
+    if njit:
+        kernel = _supertrend_jit
+    elif close.shape[0] <= 16:
+        kernel = _supertrend_lists
+    else:
+        kernel = _supertrend_numpy
+    kernel(high, low, close, atr, float(multiplier), st, direction)
+
+    if one_d:
+        return st[0], direction[0]
+    return st, direction
 
-        supertrend.iloc[i] = (
-            lowerband.iloc[i] if direction else upperband.iloc[i]
-        )
 
-    return supertrend
+def compute_supertrend(df, period=10, multiplier=3):
+    st, direction = supertrend_arrays(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(),
+        period, multiplier
+    )
+    return (
+        pd.Series(st, index=df.index),
+        pd.Series(direction, index=df.index)
+    )
 
 
 # =========================================================
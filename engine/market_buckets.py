@@ -1,26 +1,39 @@
-def assign_bucket(d):
-    rsi = d["rsi"]
-    ema9, ema26, ema50 = d["ema9"], d["ema26"], d["ema50"]
-    price = d["ltp"]
-    vwap = d["vwap"]
-    adx = d["adx"]
+import numpy as np
+import pandas as pd
+
+from config import MARKET_BUCKETS, MARKET_BUCKET_DEFAULT
+from engine.filter_sets import COMPARE
 
-    if rsi >= 80 and price > vwap and adx >= 25:
-        return "Extreme Bought"
+BUCKET_ORDER = [label for label, _ in MARKET_BUCKETS] + [MARKET_BUCKET_DEFAULT]
 
-    if 70 <= rsi < 80 and price > ema9 and adx >= 20:
-        return "Overbought"
 
-    if 55 <= rsi < 70 and ema9 > ema26 > ema50 and price > vwap:
-        return "Bullish Trend"
+def assign_buckets(table, rules=MARKET_BUCKETS, default=MARKET_BUCKET_DEFAULT):
+    """
+    Whole results table (rsi, ema9/26/50, vwap, adx, close columns) ->
+    categorical Series of buckets, categories in rule order then default.
+    Each rule is a few array comparisons; np.select takes the first
+    match per row, so the universe is classified in one pass per rule.
+    """
+    arrays = {}
 
-    if 30 < rsi <= 45 and ema9 < ema26 < ema50 and price < vwap:
-        return "Bearish Trend"
+    def col(name):
+        if name not in arrays:
+            arrays[name] = table[name].to_numpy(dtype=float)
+        return arrays[name]
 
-    if 20 < rsi <= 30:
-        return "Oversold"
+    hits = []
+    for _, conditions in rules:
+        hit = np.ones(len(table), dtype=bool)
+        for column, op, other in conditions:
+            # Operand: another column (close > vwap) or a threshold (rsi >= 80)
+            hit &= COMPARE[op](col(column), col(other) if isinstance(other, str) else other)
+        hits.append(hit)
 
-    if rsi <= 20:
-        return "Extreme Sold"
+    codes = np.select(hits, np.arange(len(rules)), default=len(rules))
+    labels = [label for label, _ in rules] + [default]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=table.index)
 
-    return "Neutral"
+
+def assign_bucket(d):
+    """One result dict (per-symbol callers); same thresholds as assign_buckets."""
+    return assign_buckets(pd.DataFrame([d])).iat[0]
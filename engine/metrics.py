@@ -0,0 +1,213 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Upper bounds (seconds), ~x2.5 apart: 0.1 ms .. 60 s, then +Inf
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# =========================================================
+# HISTOGRAM
+# =========================================================
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus layout, cumulative)."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.last = math.nan
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+        self.last = seconds
+
+    def merge(self, counts, total, count):
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q):
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if math.isfinite(BUCKETS[i]) else lo
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-2]
+
+
+# =========================================================
+# REGISTRY
+# =========================================================
+class Metrics:
+    """
+    Process-wide per-stage latency histograms. Stage names are dotted:
+    fetch.* (Dhan / network), decode.* + store.* + indicator.* +
+    stream.* + alerts.* (CPU), scan.total, and bucket / render (UI). Panel engines
+    observe one call per universe, the batch engine one per symbol.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def export(self):
+        """Raw bucket state, picklable (process pool workers -> parent)."""
+        with self._lock:
+            return {
+                stage: (list(h.counts), h.sum, h.count)
+                for stage, h in self.stages.items()
+            }
+
+    def merge(self, exported):
+        with self._lock:
+            for stage, state in exported.items():
+                self.stages.setdefault(stage, Histogram()).merge(*state)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+    def summary(self):
+        """{stage: {count, mean, p50, p95, p99, last}} in seconds, JSON-safe."""
+        with self._lock:
+            out = {}
+            for stage, h in sorted(self.stages.items()):
+                row = {"count": h.count, "mean": h.sum / h.count if h.count else None}
+                for q in QUANTILES:
+                    row[f"p{int(q * 100)}"] = h.quantile(q)
+                row["last"] = None if math.isnan(h.last) else h.last
+                out[stage] = row
+            return out
+
+    def prometheus(self, prefix="scanner"):
+        """Prometheus text exposition (histograms + p50/p95/p99 gauges)."""
+        name = f"{prefix}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of scan pipeline stages.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for stage, h in stages:
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            lines += [
+                f"# HELP {name}_quantile Estimated stage latency quantiles.",
+                f"# TYPE {name}_quantile gauge",
+            ]
+            for stage, h in stages:
+                for q in QUANTILES:
+                    lines.append(
+                        f'{name}_quantile{{stage="{stage}",quantile="{q:g}"}} '
+                        f"{h.quantile(q):.6f}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+# =========================================================
+# /metrics ENDPOINT
+# =========================================================
+def serve_metrics(port, host="0.0.0.0", registry=METRICS):
+    """Serve registry.prometheus() on http://host:port/metrics (daemon thread)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# =========================================================
+# DASHBOARD TABLE
+# =========================================================
+SOURCES = (
+    ("fetch.", "Dhan / network"),
+    ("decode.", "CPU"),
+    ("store.", "CPU"),
+    ("indicator.", "CPU"),
+    ("stream.", "CPU"),
+    ("alerts.", "CPU"),
+    ("scan.", "Scan total"),
+    ("bucket", "UI"),
+    ("render", "UI"),
+)
+
+
+def summary_frame(*summaries):
+    """Merge summary() dicts (later wins) into a ms table for st.dataframe."""
+    merged = {}
+    for summary in summaries:
+        merged.update(summary or {})
+
+    rows = []
+    for stage, row in merged.items():
+        source = next((s for p, s in SOURCES if stage.startswith(p)), "")
+        rows.append({
+            "Source": source,
+            "Stage": stage,
+            "Calls": row["count"],
+            **{
+                f"{k} (ms)": None if row.get(k) is None else round(row[k] * 1000, 2)
+                for k in ("p50", "p95", "p99", "last")
+            },
+        })
+    return pd.DataFrame(rows)
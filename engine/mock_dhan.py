@@ -0,0 +1,297 @@
+"""
+Local stand-in for Dhan's charts/intraday endpoint.
+
+    python -m engine.mock_dhan --port 8765                      # synthetic candles
+    python -m engine.mock_dhan --fixtures benchmarks/data       # recorded replies
+    python -m engine.mock_dhan --latency 0.3 --jitter 0.2 --rate 20 --error-rate 0.02
+
+Point the app at it with DHAN_BASE_URL=http://127.0.0.1:8765 (any
+DHAN_ACCESS_TOKEN works). Latency, a server-side request budget that
+answers 429 + Retry-After, and random 5xx errors are all injectable, so
+worker counts, retry policy and caching can be tuned without real quota.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from engine.candle_store import IST, to_epoch
+
+ROUTE = "/v2/charts/intraday"
+
+
+# =========================================================
+# CANDLE SOURCES
+# =========================================================
+def load_fixtures(fixture_dir):
+    """Raw recorded response bodies (bytes), in file-name order."""
+    names = sorted(n for n in os.listdir(fixture_dir) if n.endswith(".json"))
+    bodies = []
+    for name in names:
+        with open(os.path.join(fixture_dir, name), "rb") as fh:
+            bodies.append(fh.read())
+    return bodies
+
+
+def redate(body, day):
+    """Shift a recorded session (whole days) so it starts on `day`."""
+    d = json.loads(body)
+    ts = d.get("timestamp") or []
+    if ts:
+        first = datetime.fromtimestamp(ts[0], IST).date()
+        shift = (day - first).days * 86400
+        d["timestamp"] = [t + shift for t in ts]
+    return d
+
+
+def synthetic_session(security_id, day, interval):
+    """
+    Deterministic random-walk session (09:15-15:30 IST) per
+    (security_id, day), so repeated requests agree bar for bar.
+    """
+    seed = zlib.crc32(f"{security_id}:{day}:{interval}".encode())
+    rng = np.random.default_rng(seed)
+    bars = 375 // interval
+
+    base = 20 + zlib.crc32(str(security_id).encode()) % 3000
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    spread = close * rng.uniform(0, 0.003, bars)
+    open_ts = to_epoch(datetime.combine(day, datetime.min.time())
+                       + timedelta(hours=9, minutes=15))
+
+    return {
+        "open": np.round(close + rng.normal(0, 1, bars) * spread, 2).tolist(),
+        "high": np.round(close + spread, 2).tolist(),
+        "low": np.round(close - spread, 2).tolist(),
+        "close": np.round(close, 2).tolist(),
+        "volume": rng.integers(500, 500_000, bars).tolist(),
+        "timestamp": (open_ts + np.arange(bars) * interval * 60).tolist(),
+    }
+
+
+def _parse_date(s):
+    # Dhan accepts "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS"
+    fmt = "%Y-%m-%d %H:%M:%S" if len(s) > 10 else "%Y-%m-%d"
+    return datetime.strptime(s, fmt)
+
+
+def clip_session(d, since, until):
+    """Bars of a Dhan-shaped response dict with since <= timestamp <= until."""
+    ts = np.asarray(d.get("timestamp", []))
+    keep = (ts >= since) & (ts <= until)
+    return {k: np.asarray(v)[keep].tolist() for k, v in d.items()}
+
+
+# =========================================================
+# SERVER
+# =========================================================
+class MockDhan:
+    """Request handling + fault injection, independent of the socket loop."""
+
+    def __init__(self, fixture_dir=None, latency=0.0, jitter=0.0,
+                 rate=None, burst=None, error_rate=0.0, retry_after=1.0):
+        self.bodies = load_fixtures(fixture_dir) if fixture_dir else None
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.capacity = float(burst or rate or 0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.sessions = {}   # (source, day, interval) -> response dict
+        self.counts = {"200": 0, "429": 0, "5xx": 0, "400": 0}
+
+    def _throttled(self):
+        if not self.rate:
+            return False
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return True
+        self.tokens -= 1
+        return False
+
+    def _session(self, security_id, day, interval):
+        if self.bodies:
+            key = (int(security_id) % len(self.bodies), day, interval)
+            if key not in self.sessions:
+                self.sessions[key] = redate(self.bodies[key[0]], day)
+        else:
+            key = (security_id, day, interval)
+            if key not in self.sessions:
+                self.sessions[key] = synthetic_session(security_id, day, interval)
+        return self.sessions[key]
+
+    def candles(self, payload):
+        fetch_from = _parse_date(payload["fromDate"])
+        to_day = _parse_date(payload["toDate"]).date()
+        interval = int(payload.get("interval", 5))
+
+        # Every weekday in the window, up to the bar forming right now
+        out = {k: [] for k in ("open", "high", "low", "close", "volume", "timestamp")}
+        day = fetch_from.date()
+        while day <= to_day:
+            if day.weekday() < 5:
+                d = clip_session(self._session(payload["securityId"], day, interval),
+                                 to_epoch(fetch_from), time.time())
+                for k in out:
+                    out[k].extend(d.get(k, []))
+            day += timedelta(days=1)
+        return out
+
+    async def respond(self, payload):
+        """(status, headers, body dict) for one charts/intraday POST."""
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if self._throttled():
+            self.counts["429"] += 1
+            return 429, {"Retry-After": f"{self.retry_after:g}"}, {
+                "errorType": "Rate_Limit", "errorCode": "DH-904",
+                "errorMessage": "Too many requests",
+            }
+
+        if random.random() < self.error_rate:
+            self.counts["5xx"] += 1
+            return random.choice((500, 502, 503)), {}, {
+                "errorType": "Internal_Server_Error", "errorCode": "DH-908",
+                "errorMessage": "Injected failure",
+            }
+
+        try:
+            body = self.candles(payload)
+        except (KeyError, ValueError) as e:
+            self.counts["400"] += 1
+            return 400, {}, {"errorType": "Input_Exception", "errorCode": "DH-905",
+                             "errorMessage": str(e)}
+
+        self.counts["200"] += 1
+        return 200, {}, body
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+async def _handle(reader, writer, mock):
+    # Minimal HTTP/1.1 keep-alive loop: one JSON POST in, one JSON body out
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.split(b"\r\n")
+            length = 0
+            for line in lines[1:]:
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            raw = await reader.readexactly(length)
+
+            if lines[0].split(b" ")[1].split(b"?")[0].decode() != ROUTE:
+                status, headers, body = 404, {}, {"errorMessage": "Not found"}
+            else:
+                try:
+                    status, headers, body = await mock.respond(json.loads(raw))
+                except ValueError:
+                    status, headers, body = 400, {}, {"errorMessage": "Bad JSON"}
+
+            out = json.dumps(body).encode()
+            extra = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n{extra}"
+                f"Content-Length: {len(out)}\r\n\r\n".encode() + out
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _report(mock, every):
+    while True:
+        await asyncio.sleep(every)
+        print("[MOCK] " + "  ".join(f"{k}: {v}" for k, v in mock.counts.items()))
+
+
+def serve(host="127.0.0.1", port=8765, port_queue=None, stats_every=None, **options):
+    mock = MockDhan(**options)
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda r, w: _handle(r, w, mock), host, port, backlog=1024
+        )
+        bound = server.sockets[0].getsockname()[1]
+        if port_queue is not None:
+            port_queue.put(bound)
+        else:
+            print(f"[MOCK] Dhan stand-in on http://{host}:{bound}{ROUTE}")
+        if stats_every:
+            asyncio.ensure_future(_report(mock, stats_every))
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+class MockServer:
+    """
+    MockDhan in a child process (its own GIL), for benchmarks and load
+    tests. Context manager; .base_url / .url point at the running server.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.base_url = self.url = None
+        self._proc = None
+
+    def __enter__(self):
+        ctx = mp.get_context("spawn")
+        ports = ctx.Queue()
+        self._proc = ctx.Process(
+            target=serve, kwargs=dict(port=0, port_queue=ports, **self.options),
+            daemon=True
+        )
+        self._proc.start()
+        self.base_url = f"http://127.0.0.1:{ports.get(timeout=30)}"
+        self.url = self.base_url + ROUTE
+        return self
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        self._proc.join()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock Dhan charts/intraday server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default=None,
+                    help="directory of recorded responses (default: synthetic)")
+    ap.add_argument("--latency", type=float, default=0.0, help="base seconds per request")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra uniform [0, jitter] seconds")
+    ap.add_argument("--rate", type=float, default=None,
+                    help="requests/sec before answering 429 (default: unlimited)")
+    ap.add_argument("--burst", type=float, default=None)
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of 5xx replies")
+    ap.add_argument("--stats-every", type=float, default=10.0)
+    args = ap.parse_args()
+
+    serve(args.host, args.port, stats_every=args.stats_every,
+          fixture_dir=args.fixtures, latency=args.latency, jitter=args.jitter,
+          rate=args.rate, burst=args.burst, error_rate=args.error_rate,
+          retry_after=args.retry_after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Local stand-in for Dhan's live market feed (WebSocket, v2 binary quotes).
+
+    python -m engine.mock_feed --port 8766                  # random walk per symbol
+    python -m engine.mock_feed --source store --speed 10    # replay stored 1-minute bars
+    DHAN_FEED_URL=ws://127.0.0.1:8766 python -m engine.scanner --stream
+
+Walks start from the REST stand-in's synthetic price (engine/mock_dhan),
+so a scanner warmed up against it streams on from the same levels. The
+store source replays each symbol's stored FEED_INTERVAL bars as
+open/high/low/close ticks, `speed` bars per second. Ticks are stamped
+with the current time either way, so live candles form as usual.
+Any DHAN_CLIENT_ID / DHAN_ACCESS_TOKEN is accepted. Needs the optional
+`websockets` package.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import date
+
+import websockets
+
+from config import FEED_INTERVAL
+from engine.candle_store import STORE
+from engine.mock_dhan import synthetic_session, clip_session
+from engine.tick_feed import encode_quote
+
+
+# =========================================================
+# PRICE SOURCES: (price, traded qty) per tick
+# =========================================================
+def walk(security_id, sigma=0.0005):
+    d = clip_session(synthetic_session(security_id, date.today(), FEED_INTERVAL),
+                     0, time.time())
+    price = d["close"][-1] if d["close"] else synthetic_session(
+        security_id, date.today(), FEED_INTERVAL)["open"][0]
+    while True:
+        price *= math.exp(random.gauss(0, sigma))
+        yield round(price, 2), random.randint(1, 5_000)
+
+
+def replay(security_id):
+    bars = STORE.load(str(security_id), FEED_INTERVAL)
+    if bars.empty:
+        yield from walk(security_id)
+        return
+    while True:
+        for bar in bars.itertuples(index=False):
+            qty = max(int(bar.volume) // 4, 1)
+            for price in (bar.open, bar.high, bar.low, bar.close):
+                yield float(price), qty
+
+
+# =========================================================
+# SERVER
+# =========================================================
+async def _handle(ws, source, rate):
+    paths, volumes = {}, {}
+
+    async def subscriptions():
+        async for message in ws:
+            for item in json.loads(message).get("InstrumentList", []):
+                sid = str(item["SecurityId"])
+                if sid not in paths:
+                    paths[sid] = source(sid)
+                    volumes[sid] = 0
+
+    reader = asyncio.ensure_future(subscriptions())
+    try:
+        while not reader.done():
+            await asyncio.sleep(1 / rate)
+            now = time.time()
+            packets = []
+            for sid, path in list(paths.items()):
+                price, qty = next(path)
+                volumes[sid] += qty
+                packets.append(encode_quote(sid, price, now, volumes[sid]))
+            if packets:
+                await ws.send(b"".join(packets))
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        reader.cancel()
+
+
+def serve(host="127.0.0.1", port=8766, source="walk", speed=1.0):
+    pick = walk if source == "walk" else replay
+    # A store replay ticks four times per bar
+    rate = speed * (4 if source == "store" else 1)
+
+    async def main():
+        async with websockets.serve(lambda ws, *_: _handle(ws, pick, rate), host, port,
+                                    max_size=None):
+            print(f"[MOCK] Dhan feed stand-in on ws://{host}:{port} ({source})")
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock Dhan live market feed")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--source", choices=("walk", "store"), default="walk")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="ticks per second per symbol (store: bars per second)")
+    args = ap.parse_args()
+    serve(args.host, args.port, args.source, args.speed)
+
+
+if __name__ == "__main__":
+    main()
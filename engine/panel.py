@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+from engine.candle_store import session_day
+from engine.indicators import (
+    rolling_mean, true_range, supertrend_arrays, rsi_array
+)
+from engine.metrics import METRICS
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# =========================================================
+# CANDLES -> (symbols x time) PANEL
+# =========================================================
+class Panel:
+    """
+    Right-aligned candle panel: row i holds one symbol's series, its last
+    bar in the last column and NaN padding on the left. Indicators are
+    per-row recurrences, so wall-clock alignment is not needed.
+    """
+
+    def __init__(self, ids, block, lengths, last_ts, session_bars=None):
+        self.ids = ids
+        self.block = block              # (len(FIELDS), symbols, time)
+        self.lengths = lengths
+        self.last_ts = last_ts
+        # Bars of each symbol's last session (VWAP anchor); default: all
+        self.session_bars = lengths if session_bars is None else session_bars
+        for name, arr in zip(FIELDS, block):
+            setattr(self, name, arr)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_panel(candles, min_bars=30):
+    """candles: {security_id: DataFrame} -> Panel of symbols with >= min_bars."""
+    frames = {
+        sid: df for sid, df in candles.items()
+        if df is not None and len(df) >= min_bars
+    }
+    ids = list(frames)
+    width = max((len(df) for df in frames.values()), default=0)
+
+    block = np.full((len(FIELDS), len(ids), width), np.nan)
+    lengths = np.zeros(len(ids), dtype=np.int64)
+    last_ts = np.zeros(len(ids), dtype=np.int64)
+    session_bars = np.zeros(len(ids), dtype=np.int64)
+
+    for i, sid in enumerate(ids):
+        df = frames[sid]
+        n = len(df)
+        lengths[i] = session_bars[i] = n
+        if "timestamp" in df:
+            last_ts[i] = df["timestamp"].iat[-1]
+            day = session_day(df["timestamp"].to_numpy(dtype=np.int64))
+            session_bars[i] = n - np.searchsorted(day, day[-1])
+        cols = df.columns.get_indexer(FIELDS)
+        block[:, i, width - n:] = df.to_numpy(dtype=float)[:, cols].T
+
+    return Panel(ids, block, lengths, last_ts, session_bars)
+
+
+# =========================================================
+# VECTORIZED INDICATORS (axis = time, leading NaN aware)
+# =========================================================
+def ema_2d(x, period):
+    """ewm(span=period, adjust=False) per row, starting at each row's first value."""
+    alpha = 2 / (period + 1)
+    pad = np.isnan(x)
+
+    # Back-fill the left padding with each row's first value: the EMA of a
+    # constant prefix stays at that value, so the recurrence needs no branch
+    first = np.argmax(~pad, axis=1)
+    seed = x[np.arange(x.shape[0]), first]
+    x = np.where(pad, seed[:, None], x)
+
+    out = np.empty_like(x)
+    prev = x[:, 0]
+    for t in range(x.shape[1]):
+        prev = alpha * x[:, t] + (1 - alpha) * prev
+        out[:, t] = prev
+
+    out[pad] = np.nan
+    return out
+
+
+def diff_2d(x):
+    out = np.full(x.shape, np.nan)
+    out[:, 1:] = x[:, 1:] - x[:, :-1]
+    return out
+
+
+def adx_2d(high, low, close, period=14):
+    plus_dm = diff_2d(high)
+    minus_dm = -diff_2d(low)
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm < 0] = 0
+
+    atr = rolling_mean(true_range(high, low, close), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (rolling_mean(plus_dm, period) / atr)
+        minus_di = 100 * (rolling_mean(minus_dm, period) / atr)
+        dx = (np.abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
+
+    return rolling_mean(dx, period)
+
+
+def vwap_last(high, low, close, volume, session_bars=None):
+    tp = (high + low + close) / 3
+    if session_bars is not None:
+        # Only each symbol's last session counts (right-aligned panel)
+        width = high.shape[1]
+        earlier = np.arange(width) < (width - session_bars)[:, None]
+        volume = np.where(earlier, np.nan, volume)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nansum(tp * volume, axis=1) / np.nansum(volume, axis=1)
+
+
+def volume_spike_2d(volume, lengths, lookback=5, multiplier=1.2):
+    recent = volume[:, -lookback:]
+    baseline = volume[:, -(lookback + 5):-lookback].mean(axis=1)
+    spike = (recent > (baseline * multiplier)[:, None]).any(axis=1)
+    return spike & (lengths >= lookback + 5)
+
+
+# =========================================================
+# WHOLE-UNIVERSE COMPUTE
+# =========================================================
+def compute_panel(panel):
+    """
+    Last-bar indicator values for every symbol in the panel, as a frame
+    indexed by security_id (same columns as compute_indicators plus
+    rsi_prev for crossover detection).
+    """
+    if not len(panel):
+        return pd.DataFrame()
+
+    close = panel.close
+    timer = METRICS.timer
+
+    with timer("indicator.rsi"):
+        rsi = rsi_array(close)
+    with timer("indicator.ema"):
+        ema9 = ema_2d(close, 9)[:, -1]
+        ema26 = ema_2d(close, 26)[:, -1]
+        ema50 = ema_2d(close, 50)[:, -1]
+
+    with timer("indicator.macd"):
+        fast = ema_2d(close, 12)
+        slow = ema_2d(close, 26)
+        macd = fast - slow
+        signal = ema_2d(macd, 9)
+
+    with timer("indicator.adx"):
+        adx = adx_2d(panel.high, panel.low, close)
+    with timer("indicator.supertrend"):
+        st, st_dir = supertrend_arrays(panel.high, panel.low, close)
+    with timer("indicator.vwap"):
+        vwap = vwap_last(panel.high, panel.low, close, panel.volume, panel.session_bars)
+    with timer("indicator.volume_spike"):
+        spike = volume_spike_2d(panel.volume, panel.lengths)
+
+    return pd.DataFrame({
+        "rsi": rsi[:, -1],
+        "rsi_prev": rsi[:, -2] if close.shape[1] > 1 else np.nan,
+        "ema9": ema9,
+        "ema26": ema26,
+        "ema50": ema50,
+        "vwap": vwap,
+        "macd": macd[:, -1],
+        "macd_signal": signal[:, -1],
+        "adx": adx[:, -1],
+        "supertrend": st[:, -1],
+        "supertrend_dir": st_dir[:, -1].astype(int),
+        "volume_spike": spike,
+        "close": close[:, -1],
+        "volume": panel.volume[:, -1],
+        "last_ts": panel.last_ts,
+        "bars": panel.lengths,
+    }, index=pd.Index(panel.ids, name="security_id"))
+
+
+TREND_FIELDS = (
+    "rsi", "rsi_prev", "ema9", "ema26", "ema50", "supertrend", "supertrend_dir"
+)
+
+
+def compute_trend_panel(panel):
+    """
+    The per-timeframe subset of compute_panel (RSI, EMA 9/26/50,
+    Supertrend), for the extra TIMEFRAMES derived from the 1-minute feed.
+    """
+    if not len(panel):
+        return pd.DataFrame(columns=TREND_FIELDS)
+
+    close = panel.close
+    timer = METRICS.timer
+
+    with timer("indicator.rsi"):
+        rsi = rsi_array(close)
+    with timer("indicator.ema"):
+        ema = {p: ema_2d(close, p)[:, -1] for p in (9, 26, 50)}
+    with timer("indicator.supertrend"):
+        st, st_dir = supertrend_arrays(panel.high, panel.low, close)
+
+    return pd.DataFrame({
+        "rsi": rsi[:, -1],
+        "rsi_prev": rsi[:, -2] if close.shape[1] > 1 else np.nan,
+        "ema9": ema[9],
+        "ema26": ema[26],
+        "ema50": ema[50],
+        "supertrend": st[:, -1],
+        "supertrend_dir": st_dir[:, -1].astype(int),
+    }, index=pd.Index(panel.ids, name="security_id"))
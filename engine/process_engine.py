@@ -0,0 +1,103 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from config import PROCESS_WORKERS, PROCESS_CHUNK
+from engine.async_fetcher import FetchResult, fetch_stream
+from engine.metrics import METRICS
+from engine.panel import Panel, build_panel, compute_panel
+from engine.resample import derive
+
+_POOL = None
+
+
+def get_pool():
+    # One long-lived pool per process; "spawn" because Streamlit is threaded
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(
+            max_workers=PROCESS_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _POOL
+
+
+# =========================================================
+# WORKER SIDE
+# =========================================================
+def _compute_shared(shm_name, shape, ids, lengths, last_ts, session_bars):
+    """Returns (indicator frame, this chunk's stage timings for the parent)."""
+    METRICS.reset()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        result = compute_panel(Panel(ids, block, lengths, last_ts, session_bars))
+        del block
+        return result, METRICS.export()
+    finally:
+        shm.close()
+
+
+# =========================================================
+# PARENT SIDE
+# =========================================================
+def _submit(pool, panel):
+    """Copy the panel into shared memory once; workers map it, no pickling."""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, panel.block.nbytes))
+    shared = np.ndarray(panel.block.shape, dtype=np.float64, buffer=shm.buf)
+    shared[:] = panel.block
+    del shared
+
+    future = pool.submit(
+        _compute_shared, shm.name, panel.block.shape,
+        panel.ids, panel.lengths, panel.last_ts, panel.session_bars
+    )
+
+    def release(_):
+        shm.close()
+        shm.unlink()
+
+    future.add_done_callback(release)
+    return future
+
+
+def run_pipelined(security_ids, interval=5, lookback_days=None,
+                  min_bars=30, chunk_size=PROCESS_CHUNK, feed=None):
+    """
+    Fetch stage (async I/O thread) -> chunks of candles -> shared-memory
+    panels -> ProcessPoolExecutor. Candles are fetched at `feed` minutes
+    (default: interval) and resampled to `interval` per chunk. Returns
+    (feed FetchResult, interval FetchResult, indicator frame keyed by
+    security_id, as compute_panel).
+    """
+    pool = get_pool()
+    feed = feed or interval
+    fed = FetchResult()
+    candles = FetchResult()
+    pending = []
+
+    for chunk in fetch_stream(security_ids, chunk_size, feed, lookback_days):
+        fed.update(chunk)
+        fed.failed.update(chunk.failed)
+        with METRICS.timer("indicator.resample"):
+            chunk = derive(chunk, interval, feed)
+        candles.update(chunk)
+        candles.failed.update(chunk.failed)
+
+        with METRICS.timer("indicator.build_panel"):
+            panel = build_panel(chunk, min_bars=min_bars)
+        if len(panel):
+            pending.append(_submit(pool, panel))
+
+    frames = []
+    for future in pending:
+        frame, timings = future.result()
+        METRICS.merge(timings)
+        frames.append(frame)
+    if not frames:
+        return fed, candles, pd.DataFrame()
+    return fed, candles, pd.concat(frames)
@@ -0,0 +1,210 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+
+# =========================================================
+# ONE-PASS TOP-N PER BUCKET, FOR SEVERAL FILTER SETS
+# =========================================================
+def bucket_codes(labels, order):
+    """Categorical codes of labels over `order` (-1 = not in order)."""
+    return np.asarray(pd.Categorical(labels, categories=order).codes)
+
+
+def _top(positions, key, n):
+    # argpartition picks the n largest in O(len); only those n get sorted
+    if key is None:
+        return positions if n is None else positions[:n]
+    k = -key[positions]
+    if n is not None and len(positions) > n:
+        part = np.argpartition(k, n - 1)[:n]
+        return positions[part[np.argsort(k[part], kind="stable")]]
+    return positions[np.argsort(k, kind="stable")]
+
+
+def select_top(codes, masks, n, n_buckets, key=None):
+    """
+    {set name: [row positions per bucket code]}: the rows of each bucket
+    passing each set's mask, top-n by key descending (n=None: all;
+    key=None: table order). The table is partitioned by bucket once and
+    every set selects from those partitions, so S sets x B buckets cost
+    one O(n log n) grouping plus O(S x n) selection, not S x B sorts.
+    """
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_buckets + 1))
+    key = None if key is None else np.asarray(key, dtype=float)
+
+    out = {name: [] for name in masks}
+    for b in range(n_buckets):
+        members = order[bounds[b]:bounds[b + 1]]
+        for name, mask in masks.items():
+            out[name].append(_top(members[mask[members]], key, n))
+    return out
+
+
+def bucket_tables(table, masks, order, n=None, key=None, bucket="Bucket"):
+    """
+    {set name: {bucket: DataFrame}} in `order`, empty buckets dropped.
+    masks = {set name: boolean array over table rows}.
+    """
+    codes = bucket_codes(table[bucket], order)
+    picked = select_top(
+        codes, {name: np.asarray(m, dtype=bool) for name, m in masks.items()},
+        n, len(order), None if key is None else table[key].to_numpy()
+    )
+    return {
+        name: {order[b]: table.iloc[pos] for b, pos in enumerate(per_bucket) if len(pos)}
+        for name, per_bucket in picked.items()
+    }
+
+
+# =========================================================
+# SNAPSHOT DIFF
+# =========================================================
+def diff_rows(prev, new, columns):
+    """
+    (changed, removed) security_ids between two tables indexed by
+    security_id: changed = new rows plus rows whose `columns` differ.
+    """
+    if prev is None or prev.empty:
+        return new.index, pd.Index([])
+
+    removed = prev.index.difference(new.index)
+    common = new.index.intersection(prev.index)
+    a = prev.loc[common, columns]
+    b = new.loc[common, columns]
+    modified = common[((a != b) & ~(a.isna() & b.isna())).any(axis=1).to_numpy()]
+    return new.index.difference(prev.index).append(modified), removed
+
+
+# =========================================================
+# PER-BUCKET RANKING KEPT ACROSS SNAPSHOTS
+# =========================================================
+class BucketRanking:
+    """
+    One filter set's rows, ranked by `key` (descending) within each bucket.
+    update() re-ranks only the rows that changed since the last snapshot,
+    so a refresh costs O(changed x log n) instead of a sort per bucket.
+
+    n = rows kept per bucket (the visible top-n; None = all). A capped
+    bucket that loses one of its rows is refilled from the table with one
+    argpartition over that bucket.
+    """
+
+    def __init__(self, mask_fn, key="Volume", bucket="Bucket", n=None):
+        self.mask_fn = mask_fn
+        self.key = key
+        self.bucket = bucket
+        self.n = n
+        self.ranks = {}        # bucket -> sorted [(-key, security_id)]
+        self.where = {}        # security_id -> (bucket, (-key, security_id))
+        self.capped = set()    # buckets with more passing rows than n
+        self.table = None
+        self.dirty = set()     # buckets touched by the last update()
+
+    def _remove(self, sid):
+        bucket, entry = self.where.pop(sid)
+        ranks = self.ranks[bucket]
+        del ranks[bisect_left(ranks, entry)]
+        self.dirty.add(bucket)
+
+    def _insert(self, sid, bucket, value):
+        entry = (-float(value), sid)
+        ranks = self.ranks.setdefault(bucket, [])
+        if self.n and len(ranks) >= self.n:
+            self.capped.add(bucket)
+            if entry >= ranks[-1]:
+                return    # below the visible top-n
+            del self.where[ranks.pop()[1]]
+        insort(ranks, entry)
+        self.where[sid] = (bucket, entry)
+        self.dirty.add(bucket)
+
+    def _place(self, bucket, table, pos):
+        # Ranked input: sorted() only orders key ties by id, in ~linear time
+        keys = table[self.key].to_numpy(dtype=float)[pos]
+        entries = self.ranks[bucket] = sorted(zip(-keys, table.index.to_numpy()[pos]))
+        for entry in entries:
+            self.where[entry[1]] = (bucket, entry)
+        if self.n and len(pos) >= self.n:
+            self.capped.add(bucket)   # may hold more passing rows than shown
+        else:
+            self.capped.discard(bucket)
+
+    def load(self, table, positions):
+        """Cold start from select_top() positions (already ranked per bucket)."""
+        self.ranks, self.where, self.capped = {}, {}, set()
+        buckets = table[self.bucket].to_numpy()
+        for pos in positions:
+            if len(pos):
+                self._place(buckets[pos[0]], table, pos[:self.n])
+        self.dirty = set(self.ranks)
+        self.table = table
+
+    def _refill(self, bucket):
+        for _, sid in self.ranks.pop(bucket, []):
+            del self.where[sid]
+        members = np.flatnonzero(self.table[self.bucket].to_numpy() == bucket)
+        members = members[np.asarray(self.mask_fn(self.table.iloc[members]), dtype=bool)]
+        key = self.table[self.key].to_numpy(dtype=float)
+        self._place(bucket, self.table, _top(members, key, self.n))
+        self.dirty.add(bucket)
+
+    def update(self, table, columns):
+        """table indexed by security_id; columns = fields whose change re-ranks a row."""
+        self.dirty = set()
+        if table is self.table:
+            return self.dirty
+        changed, removed = diff_rows(self.table, table, columns)
+
+        lost = set()
+        for sid in removed.append(changed):
+            if sid in self.where:
+                lost.add(self.where[sid][0])
+                self._remove(sid)
+
+        rows = table.loc[changed]
+        keep = np.asarray(self.mask_fn(rows), dtype=bool)
+        for sid, bucket, value in zip(
+            rows.index[keep], rows[self.bucket].to_numpy()[keep],
+            rows[self.key].to_numpy()[keep]
+        ):
+            self._insert(sid, bucket, value)
+
+        self.table = table
+        # A capped bucket that lost a row may now rank an unheld row in its top-n
+        for bucket in lost & self.capped:
+            self._refill(bucket)
+        return self.dirty
+
+    def top(self, bucket, n):
+        """Top-n security_ids of a bucket, highest key first."""
+        return [sid for _, sid in self.ranks.get(bucket, [])[:n]]
+
+    def frame(self, bucket, n):
+        return self.table.loc[self.top(bucket, n)]
+
+
+def update_rankings(rankings, table, columns):
+    """
+    Bring several rankings up to `table`. Fresh ones (first snapshot or
+    edited filters) are cold-loaded together from one select_top() pass;
+    the rest re-rank only changed rows.
+    """
+    fresh = [r for r in rankings if r.table is None]
+    if fresh and not table.empty:
+        order = list(pd.unique(table[fresh[0].bucket]))
+        # Capped rankings only need their top-n: argpartition, not a full sort
+        depth = None if any(r.n is None for r in fresh) else max(r.n for r in fresh)
+        picked = select_top(
+            bucket_codes(table[fresh[0].bucket], order),
+            {i: np.asarray(r.mask_fn(table), dtype=bool) for i, r in enumerate(fresh)},
+            depth, len(order), table[fresh[0].key].to_numpy()
+        )
+        for i, r in enumerate(fresh):
+            r.load(table, picked[i])
+
+    for r in rankings:
+        if r.table is not table:
+            r.update(table, columns)
@@ -0,0 +1,190 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import requests
+
+from config import (
+    DHAN_REQUESTS_PER_SEC, DHAN_BURST,
+    FETCH_CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, TARGET_LATENCY,
+    MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+)
+from engine.metrics import METRICS
+
+
+# =========================================================
+# TOKEN BUCKET (process-wide Dhan request budget)
+# =========================================================
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve a token and sleep for the
+    returned delay, so sync threads and async tasks share one budget.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+# =========================================================
+# ADAPTIVE CONCURRENCY (AIMD on latency + errors)
+# =========================================================
+class AdaptiveConcurrency:
+    """
+    Additive increase while requests succeed under TARGET_LATENCY,
+    multiplicative decrease on slow responses, 429s and 5xx.
+    The limit survives across scans so each refresh starts where the
+    previous one settled.
+    """
+
+    def __init__(self, initial, min_limit, max_limit, target_latency):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.latency_ewma = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return int(self.limit)
+
+    def on_success(self, latency):
+        with self._lock:
+            self.latency_ewma = (
+                latency if self.latency_ewma is None
+                else 0.8 * self.latency_ewma + 0.2 * latency
+            )
+            if self.latency_ewma <= self.target_latency:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+
+    def on_throttle(self):
+        with self._lock:
+            self.limit = max(self.min_limit, self.limit * 0.5)
+
+    def on_error(self):
+        with self._lock:
+            self.limit = max(self.min_limit, self.limit * 0.8)
+
+    def gate(self, cap=None):
+        # asyncio primitives are loop-bound, so each fetch run gets its own;
+        # cap limits that run only, the learned limit stays shared
+        return _AsyncGate(self, cap)
+
+
+class _AsyncGate:
+    def __init__(self, controller, cap=None):
+        self.controller = controller
+        self.cap = max(1, int(cap)) if cap else None
+        self.inflight = 0
+        self.cond = asyncio.Condition()
+
+    @property
+    def limit(self):
+        current = self.controller.current
+        return current if self.cap is None else min(current, self.cap)
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self.cond:
+            await self.cond.wait_for(
+                lambda: self.inflight < self.limit
+            )
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            async with self.cond:
+                self.inflight -= 1
+                self.cond.notify_all()
+
+
+# =========================================================
+# RETRY POLICY
+# =========================================================
+def is_retryable(status_code):
+    return status_code == 429 or status_code >= 500
+
+
+def retry_after(resp):
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, hint=None):
+    # Exponential backoff with full jitter, Retry-After as a floor
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    return max(delay, hint or 0)
+
+
+def post_with_retry(session, url, **kwargs):
+    """
+    Blocking POST through the shared budget. Returns the last response
+    (None if every attempt failed at the transport level).
+    """
+    resp = None
+    for attempt in range(MAX_RETRIES + 1):
+        METRICS.observe("fetch.queue_wait", LIMITER.acquire())
+        start = time.perf_counter()
+        try:
+            resp = session.post(url, **kwargs)
+        except requests.RequestException:
+            resp = None
+            CONTROLLER.on_error()
+        else:
+            METRICS.observe("fetch.request", time.perf_counter() - start)
+            # requests' elapsed: request sent -> response headers parsed
+            METRICS.observe("fetch.server", resp.elapsed.total_seconds())
+            if resp.status_code == 200:
+                CONTROLLER.on_success(time.perf_counter() - start)
+                return resp
+            if not is_retryable(resp.status_code):
+                return resp
+            if resp.status_code == 429:
+                CONTROLLER.on_throttle()
+            else:
+                CONTROLLER.on_error()
+
+        if attempt < MAX_RETRIES:
+            time.sleep(retry_delay(attempt, retry_after(resp)))
+
+    return resp
+
+
+LIMITER = TokenBucket(DHAN_REQUESTS_PER_SEC, DHAN_BURST)
+CONTROLLER = AdaptiveConcurrency(
+    FETCH_CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, TARGET_LATENCY
+)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from config import FEED_INTERVAL
+from engine.async_fetcher import FetchResult
+from engine.candle_store import STORE, IST, COLUMNS
+
+IST_OFFSET = int(IST.utcoffset(None).total_seconds())
+SESSION_OPEN = (9 * 60 + 15) * 60   # 09:15 IST, seconds after midnight
+
+
+# =========================================================
+# BASE BARS -> COARSER BARS (vectorized)
+# =========================================================
+def bar_open(ts, minutes):
+    """Open time of the `minutes` bar each timestamp falls in, on a 09:15 IST grid."""
+    step = minutes * 60
+    since_open = (np.asarray(ts, dtype=np.int64) + IST_OFFSET - SESSION_OPEN) % 86400
+    return ts - since_open % step
+
+
+def resample(ohlc, minutes):
+    """
+    Candle frame -> `minutes` bars (first open, max high, min low, last
+    close, summed volume), stamped with the bar open like Dhan's. Bars
+    never span sessions; the last one may still be forming.
+    """
+    if ohlc.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    ts = ohlc["timestamp"].to_numpy(dtype=np.int64)
+    opens = bar_open(ts, minutes)
+    starts = np.r_[0, np.flatnonzero(np.diff(opens)) + 1]
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    return pd.DataFrame({
+        "timestamp": opens[starts],
+        "open": ohlc["open"].to_numpy(dtype=float)[starts],
+        "high": np.maximum.reduceat(ohlc["high"].to_numpy(dtype=float), starts),
+        "low": np.minimum.reduceat(ohlc["low"].to_numpy(dtype=float), starts),
+        "close": ohlc["close"].to_numpy(dtype=float)[ends],
+        "volume": np.add.reduceat(ohlc["volume"].to_numpy(dtype=float), starts),
+    })
+
+
+# =========================================================
+# INCREMENTAL DERIVED TIMEFRAMES (kept in the candle store)
+# =========================================================
+def sync_timeframe(security_id, base, minutes, store=STORE, history=False,
+                   base_interval=FEED_INTERVAL):
+    """
+    Bring the stored `minutes` bars of one symbol up to date with `base`
+    (fresh base_interval candles). Only base bars from the last stored
+    (possibly still forming) bar onwards are re-aggregated; earlier bars
+    are final. Returns the bars covering `base`, or the whole stored
+    history with history=True (longer timeframes need more than a session).
+    """
+    if base.empty:
+        return store.load(security_id, minutes) if history else base
+
+    first = int(bar_open(base["timestamp"].iat[0], minutes))
+    last = store.last_timestamp(security_id, minutes)
+    start = first if last is None or last < first else last
+
+    if base["timestamp"].iat[0] > start:
+        # base starts mid-bar: the bar's earlier minutes are in the store
+        tail = store.load(security_id, base_interval, since=start)
+    else:
+        tail = base[base["timestamp"].to_numpy() >= start]
+    return store.append(security_id, minutes, resample(tail, minutes),
+                        since=None if history else first)
+
+
+def derive(candles, minutes, base_interval=FEED_INTERVAL, store=STORE, history=False):
+    """
+    FetchResult of base_interval candles -> FetchResult of `minutes` bars
+    (failures carried over). Same interval: returned unchanged.
+    """
+    if minutes == base_interval:
+        return candles
+
+    out = FetchResult()
+    out.failed = dict(candles.failed)
+    for sid, ohlc in candles.items():
+        out[sid] = sync_timeframe(sid, ohlc, minutes, store, history, base_interval)
+    return out
+
+
+def feed_interval(minutes):
+    """FEED_INTERVAL when `minutes` can be built from it, else `minutes` itself."""
+    return FEED_INTERVAL if minutes % FEED_INTERVAL == 0 else minutes
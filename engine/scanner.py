@@ -0,0 +1,274 @@
+"""
+Standalone market scanner.
+
+    python -m engine.scanner            # scan after every INTERVAL candle close
+    python -m engine.scanner --every 60 # fixed cadence in seconds
+    python -m engine.scanner --once
+    python -m engine.scanner --metrics-port 9108  # Prometheus text on /metrics
+    python -m engine.scanner --stream   # live WebSocket ticks (engine/tick_feed.py)
+
+Each scan is published to the SQLite snapshot store; the Streamlit
+dashboards only read it, so Dhan traffic no longer scales with viewers.
+In --stream mode a polling scan warms up the incremental indicator
+state, then ticks update it and a snapshot is republished every
+STREAM_PUBLISH_SECONDS; after a disconnect another polling scan
+backfills the gap before the feed resumes.
+
+Per-stage latency histograms (engine/metrics.py) and the latest alerts
+(engine/alerts.py) ride along in the snapshot meta for the dashboards.
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from config import (
+    INTERVAL, TIMEFRAMES, MIN_CANDLES, SCAN_LIMIT, SNAPSHOT_MAX_AGE,
+    SCAN_DELAY_SECONDS, SCAN_GRACE_SECONDS, SCAN_LOOKBACK_DAYS, NIFTY_SECURITY_ID, METRICS_PORT
+)
+from engine.candle_store import STORE, to_epoch
+from engine.async_fetcher import fetch_many
+from engine.data_fetcher import session_start
+from engine.indicator_engine import compute_universe
+from engine.indicators import rsi_array
+from engine.metrics import METRICS, serve_metrics
+from engine.snapshot_store import publish, load_snapshot, scan_lock
+from engine.symbols import load_symbols, bands_cover, prefilter_by_price, record_prices
+from engine import tick_feed
+from engine.alerts import get_engine as alert_engine
+
+
+# =========================================================
+# ONE SCAN
+# =========================================================
+def universe():
+    symbols_df = load_symbols(0, float("inf"))
+    if SCAN_LIMIT:
+        symbols_df = symbols_df.head(SCAN_LIMIT)
+    return symbols_df
+
+
+def nifty_rsi():
+    try:
+        df = fetch_many([NIFTY_SECURITY_ID], interval=INTERVAL,
+                        lookback_days=SCAN_LOOKBACK_DAYS)[NIFTY_SECURITY_ID]
+    except Exception as e:
+        print(f"[ERROR] NIFTY → {e}")
+        return None
+
+    if df.empty or len(df) < 20:
+        return None
+    rsi = rsi_array(df["close"].to_numpy(dtype=float), last=1)[-1]
+    return None if np.isnan(rsi) else float(rsi)
+
+
+def scan_once(symbols_df=None, price_bands=None, next_scan=None):
+    """
+    price_bands=None scans the whole universe; otherwise only symbols that
+    can fall in one of the [lo, hi] bands are fetched (recorded in meta so
+    viewers with wider filters know to rescan).
+
+    next_scan (daemon only) -> when the next scan is due, published as
+    meta["next_run"] so viewers trust this snapshot until then.
+    """
+    symbols_df = universe() if symbols_df is None else symbols_df
+    symbols_df = prefilter_by_price(symbols_df, price_bands)
+    start = time.time()
+
+    # Multi-day history: RSI / Supertrend carry over from the previous
+    # sessions instead of restarting (and waiting MIN_CANDLES bars) each morning
+    candles, ind = compute_universe(
+        symbols_df["SECURITY_ID"], min_bars=MIN_CANDLES, interval=INTERVAL,
+        lookback_days=SCAN_LOOKBACK_DAYS
+    )
+
+    results = (
+        symbols_df
+        .rename(columns={
+            "SECURITY_ID": "security_id",
+            "SYMBOL": "symbol",
+            "NAME_OF_COMPANY": "company",
+            "LTP": "ltp",
+        })
+        .astype({"security_id": str})
+        .join(ind, on="security_id", how="inner")
+        .reset_index(drop=True)
+    )
+    # ltp = last traded price, as LiveFeed sets it in stream mode; the
+    # stocks.csv LTP is only good for prefiltering
+    results["ltp"] = results["close"]
+
+    # Next prefilter sees where these symbols trade now
+    record_prices(results)
+
+    elapsed = time.time() - start
+    METRICS.observe("scan.total", elapsed)
+
+    meta = {
+        "scanned_at": time.time(),
+        "elapsed": round(elapsed, 2),
+        "interval": INTERVAL,
+        "timeframes": [m for m in TIMEFRAMES if m != INTERVAL],
+        "symbols": len(symbols_df),
+        "price_bands": price_bands,
+        "valid": len(results),
+        "failed": sorted(candles.failed),
+        "nifty_rsi": nifty_rsi(),
+    }
+    if next_scan:
+        meta["next_run"] = next_scan()
+    check_alerts(results, meta)
+    meta["metrics"] = METRICS.summary()
+
+    publish(results, meta)
+    return results, meta
+
+
+def check_alerts(results, meta):
+    """Fire alert rules on results; the latest alerts ride along in meta."""
+    alerts = alert_engine()
+    alerts.evaluate(results)
+    meta["alerts"] = list(alerts.recent)
+
+
+# =========================================================
+# VIEWER SIDE
+# =========================================================
+def latest_results(max_age=SNAPSHOT_MAX_AGE, price_bands=None):
+    """
+    Latest published scan. If no scanner is running (no snapshot, or one
+    older than max_age / past its daemon's next_run) scan in-process and
+    publish, so other viewers reuse it.
+    An in-process scan only fetches symbols inside price_bands.
+
+    One in-process scan runs at a time (scan_lock): viewers that went
+    stale together wait for it and take its snapshot instead of scanning.
+    Each viewer reads the latest snapshot covering its bands, not just the
+    latest one, so viewers with disjoint price filters don't evict each other.
+    """
+    def covers(meta):
+        return bands_cover(meta.get("price_bands"), price_bands)
+
+    def usable(meta, since=float("inf")):
+        if not meta:
+            return False
+        scanned_at = meta.get("scanned_at", 0)
+        if scanned_at >= since:
+            return True
+        if meta.get("next_run"):
+            # Daemon snapshot: good until its next scan should have landed
+            return time.time() <= meta["next_run"] + SCAN_GRACE_SECONDS
+        return time.time() - scanned_at <= max_age
+
+    results, meta = load_snapshot(covers)
+    if usable(meta):
+        return results, meta
+
+    waiting_since = time.time()
+    with scan_lock():
+        # Published while we waited for the lock: as fresh as our own scan
+        results, meta = load_snapshot(covers)
+        if usable(meta, since=waiting_since):
+            return results, meta
+        return scan_once(price_bands=price_bands)
+
+
+def candles_for(security_id, interval=INTERVAL, until=None, days=1):
+    """
+    Candles of one symbol straight from the candle store: the last `days`
+    calendar days up to the latest session. Pass a result's last_ts as
+    `until` to get exactly the bars it was computed on.
+    """
+    since = session_start() - timedelta(days=days - 1)
+    return STORE.load(str(security_id), interval,
+                      since=to_epoch(since), until=until)
+
+
+# =========================================================
+# DAEMON LOOP
+# =========================================================
+def next_run(every=None):
+    now = time.time()
+    if every:
+        return now + every
+    step = INTERVAL * 60
+    return (now // step + 1) * step + SCAN_DELAY_SECONDS
+
+
+def run_forever(every=None):
+    while True:
+        try:
+            _, meta = scan_once(next_scan=lambda: next_run(every))
+            print(f"[SCAN] {meta['valid']}/{meta['symbols']} symbols "
+                  f"in {meta['elapsed']}s, {len(meta['failed'])} failed")
+        except Exception as e:
+            print(f"[ERROR] scan failed → {e}")
+            meta = {}
+
+        time.sleep(max(0.0, meta.get("next_run", next_run(every)) - time.time()))
+
+
+def run_stream():
+    if not tick_feed.available():
+        print("[STREAM] needs the websockets package and DHAN_CLIENT_ID "
+              "(+ DHAN_ACCESS_TOKEN); polling instead")
+        return run_forever()
+
+    while True:
+        # Polling warmup / gap backfill, then ticks until the feed drops
+        try:
+            results, meta = scan_once()
+        except Exception as e:
+            print(f"[ERROR] backfill scan failed → {e}")
+            time.sleep(SCAN_DELAY_SECONDS)
+            continue
+
+        feed = tick_feed.LiveFeed(results)
+        feed.warm()
+        print(f"[STREAM] {len(feed.security_ids)} symbols warmed up, subscribing")
+
+        def on_publish(live):
+            check_alerts(live, meta)
+            meta.update(scanned_at=time.time(), source="stream",
+                        metrics=METRICS.summary())
+            publish(live, meta)
+
+        try:
+            asyncio.run(tick_feed.stream(feed, on_publish))
+        except Exception as e:
+            print(f"[STREAM] feed lost → {e}; backfilling")
+        # The backfill continues from the last stored bar: store them all first
+        feed.writer.flush()
+        time.sleep(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Background market scanner")
+    ap.add_argument("--once", action="store_true", help="scan once and exit")
+    ap.add_argument("--every", type=float, default=None,
+                    help="seconds between scans (default: align to INTERVAL)")
+    ap.add_argument("--stream", action="store_true",
+                    help="live WebSocket ticks, polling only for warmup / backfill")
+    ap.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                    help="serve Prometheus metrics on this port (0 = off)")
+    args = ap.parse_args()
+
+    if args.once:
+        _, meta = scan_once()
+        print(f"[SCAN] {meta['valid']}/{meta['symbols']} symbols in {meta['elapsed']}s")
+        return
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"[METRICS] http://0.0.0.0:{args.metrics_port}/metrics")
+
+    if args.stream:
+        run_stream()
+    else:
+        run_forever(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from config import PRICE_MIN, PRICE_MAX, MAX_WORKERS
+from config import MAX_WORKERS, INTERVAL
+from engine.candle_store import candle_handle
 from engine.data_fetcher import get_ohlc
 from engine.indicators import compute_rsi, compute_vwap, volume_spike
 
@@ -16,7 +17,7 @@ def scan_one(row):
         symbol = row.SYMBOL
         company = row.NAME_OF_COMPANY
 
-        ohlc = get_ohlc(security_id)
+        ohlc = get_ohlc(security_id, interval=INTERVAL)
 
         if ohlc.empty or len(ohlc) < 30:
             return None
@@ -24,10 +25,6 @@ def scan_one(row):
         close = ohlc["close"]
         price = float(close.iloc[-1])
 
-        # Price filter (temporarily relaxed)
-        if not (PRICE_MIN <= price <= PRICE_MAX):
-            return None
-
         rsi = compute_rsi(close).iloc[-1]
         vwap = compute_vwap(ohlc).iloc[-1]
         spike = volume_spike(ohlc["volume"])
@@ -36,13 +33,14 @@ def scan_one(row):
         confidence = "A" if spike and abs(rsi - 50) > 20 else "B"
 
         return {
+            **candle_handle(security_id, INTERVAL, ohlc),
             "company": company,
             "symbol": symbol,
             "price": round(price, 2),
             "rsi": round(float(rsi), 1),
             "bias": bias,
             "confidence": confidence,
-            "ohlc": ohlc
+            "volume": float(ohlc["volume"].iloc[-1])
         }
 
     except Exception as e:
@@ -78,8 +76,7 @@ def generate_signals(
                 continue
 
             # ---- VOLUME FILTER ----
-            last_vol = r["ohlc"]["volume"].iloc[-1]
-            if last_vol < min_volume:
+            if r["volume"] < min_volume:
                 continue
 
             if require_volume_spike and r["confidence"] != "A":
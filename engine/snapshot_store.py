@@ -0,0 +1,96 @@
+import fcntl
+import io
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config import SNAPSHOT_DB
+
+KEEP_SNAPSHOTS = 8   # one per active price-band set, see load_snapshot(accept)
+
+
+# =========================================================
+# SQLITE SNAPSHOT STORE (scanner writes, dashboards read)
+# =========================================================
+def _connect():
+    con = sqlite3.connect(SNAPSHOT_DB, timeout=10)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            published_at REAL NOT NULL,
+            meta TEXT NOT NULL,
+            results TEXT NOT NULL
+        )
+    """)
+    return con
+
+
+@contextmanager
+def scan_lock():
+    """
+    Exclusive claim on running an in-process scan, across Streamlit
+    sessions (threads) and processes sharing SNAPSHOT_DB.
+    """
+    with open(f"{SNAPSHOT_DB}.lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def publish(results, meta):
+    """Store one scan atomically (single row), keeping the last few."""
+    con = _connect()
+    try:
+        with con:
+            con.execute(
+                "INSERT INTO snapshots (published_at, meta, results) VALUES (?, ?, ?)",
+                (time.time(), json.dumps(meta, default=str),
+                 results.to_json(orient="split", index=False, double_precision=15))
+            )
+            con.execute(
+                "DELETE FROM snapshots WHERE id NOT IN "
+                "(SELECT id FROM snapshots ORDER BY id DESC LIMIT ?)",
+                (KEEP_SNAPSHOTS,)
+            )
+    finally:
+        con.close()
+
+
+def load_snapshot(accept=None):
+    """
+    Latest (results DataFrame, meta dict), or the latest whose meta passes
+    accept(meta) (e.g. covers a viewer's price bands); (empty frame, {})
+    if none. Only the chosen snapshot's results are read.
+    """
+    try:
+        con = _connect()
+    except sqlite3.Error:
+        return pd.DataFrame(), {}
+
+    try:
+        con.execute("BEGIN")   # one consistent read across both queries
+        for snapshot_id, published_at, meta in con.execute(
+            "SELECT id, published_at, meta FROM snapshots ORDER BY id DESC"
+        ).fetchall():
+            meta = json.loads(meta)
+            if accept is None or accept(meta):
+                break
+        else:
+            return pd.DataFrame(), {}
+        results, = con.execute(
+            "SELECT results FROM snapshots WHERE id = ?", (snapshot_id,)
+        ).fetchone()
+    finally:
+        con.close()
+
+    meta["published_at"] = published_at
+    results = pd.read_json(
+        io.StringIO(results), orient="split", dtype={"security_id": str}
+    )
+    return results, meta
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import SYMBOLS_CSV, SYMBOL_MASTER_CACHE
+
+
+# =========================================================
+# SYMBOL MASTER (stocks.csv, loaded once per file change)
+# =========================================================
+class SymbolMaster:
+    """
+    Array-backed view of stocks.csv: int32 security_ids, float32 LTP,
+    object arrays of interned symbol / name strings (one str object per
+    distinct value, shared with the by_symbol keys), sorted-price indexes
+    for O(log n) range queries and dict indexes by symbol / security_id.
+
+    `last` holds each symbol's latest scanned close (NaN until a scan
+    reports it), so price prefilters track the market without touching
+    the candle store.
+    """
+
+    def __init__(self, symbols, names, security_ids, ltp, mtime=0.0):
+        self.symbols = _interned(symbols)
+        self.names = _interned(names)
+        self.security_ids = security_ids
+        self.ltp = ltp
+        self.mtime = mtime
+
+        self._ltp_order = np.argsort(ltp, kind="stable")
+        self._ltp_sorted = ltp[self._ltp_order]
+        self._sid_order = np.argsort(security_ids, kind="stable")
+        self._sid_sorted = security_ids[self._sid_order]
+
+        self.last = np.full(len(ltp), np.nan, dtype=np.float32)
+        self.last_updated = None
+        self._index_last()
+
+        self.by_symbol = {s: i for i, s in enumerate(self.symbols.tolist())}
+        self.by_security_id = {
+            sid: i for i, sid in enumerate(security_ids.tolist())
+        }
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # ---------- queries ----------
+    def price_range(self, price_min, price_max):
+        """Row indices with price_min <= LTP <= price_max, in CSV order."""
+        lo = np.searchsorted(self._ltp_sorted, price_min, side="left")
+        hi = np.searchsorted(self._ltp_sorted, price_max, side="right")
+        return np.sort(self._ltp_order[lo:hi])
+
+    def in_bands(self, bands):
+        """Bool mask over rows whose CSV LTP or last scanned close is in any [lo, hi]."""
+        keep = np.zeros(len(self), dtype=bool)
+        for order, prices in ((self._ltp_order, self._ltp_sorted),
+                              (self._last_order, self._last_sorted)):
+            for lo, hi in bands:
+                # NaN (never scanned) sorts last and matches no band
+                start = np.searchsorted(prices, lo, side="left")
+                end = np.searchsorted(prices, hi, side="right")
+                keep[order[start:end]] = True
+        return keep
+
+    def rows(self, security_ids):
+        """Row index per security_id (-1 = not in the master)."""
+        ids = np.asarray(security_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(len(ids), -1)
+        pos = np.minimum(np.searchsorted(self._sid_sorted, ids), len(self) - 1)
+        return np.where(self._sid_sorted[pos] == ids, self._sid_order[pos], -1)
+
+    # ---------- last scanned prices ----------
+    def update_last(self, security_ids, prices):
+        """Record the latest close of scanned symbols (called after every scan)."""
+        rows = self.rows(security_ids)
+        known = rows >= 0
+        self.last[rows[known]] = np.asarray(prices, dtype=np.float32)[known]
+        self.last_updated = time.time()
+        self._index_last()
+
+    def _index_last(self):
+        self._last_order = np.argsort(self.last, kind="stable")
+        self._last_sorted = self.last[self._last_order]
+
+    def lookup(self, symbol=None, security_id=None):
+        if symbol is not None:
+            i = self.by_symbol.get(symbol)
+        else:
+            i = self.by_security_id.get(int(security_id))
+        if i is None:
+            return None
+        return {
+            "SYMBOL": str(self.symbols[i]),
+            "NAME_OF_COMPANY": str(self.names[i]),
+            "SECURITY_ID": int(self.security_ids[i]),
+            "LTP": round(float(self.ltp[i]), 2),
+        }
+
+    def frame(self, idx=None):
+        idx = slice(None) if idx is None else idx
+        return pd.DataFrame({
+            "SYMBOL": self.symbols[idx],
+            "NAME_OF_COMPANY": self.names[idx],
+            "SECURITY_ID": self.security_ids[idx],
+            # float32 storage; round back to the CSV's 2 decimals for display
+            "LTP": np.round(self.ltp[idx].astype(np.float64), 2),
+        })
+
+    # ---------- load / cache ----------
+    @classmethod
+    def from_csv(cls, path):
+        df = pd.read_csv(path)
+        df.columns = (
+            df.columns.str.strip().str.upper().str.replace(" ", "_")
+        )
+        return cls(
+            df["SYMBOL"].to_numpy(dtype=str),
+            df["NAME_OF_COMPANY"].to_numpy(dtype=str),
+            df["SECURITY_ID"].to_numpy(dtype=np.int32),
+            df["LTP"].to_numpy(dtype=np.float32),
+            mtime=os.path.getmtime(path),
+        )
+
+    def save(self, cache_path):
+        tmp = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            # fixed-width <U on disk: object arrays would need pickle
+            symbols=self.symbols.astype(str), names=self.names.astype(str),
+            security_ids=self.security_ids, ltp=self.ltp,
+            mtime=np.float64(self.mtime),
+        )
+        os.replace(tmp, cache_path)
+
+    @classmethod
+    def load(cls, path=SYMBOLS_CSV, cache_path=SYMBOL_MASTER_CACHE):
+        """Binary cache if it matches the CSV's mtime, else parse + rewrite."""
+        mtime = os.path.getmtime(path)
+        try:
+            with np.load(cache_path) as z:
+                if float(z["mtime"]) == mtime:
+                    return cls(z["symbols"], z["names"], z["security_ids"],
+                               z["ltp"], mtime=mtime)
+        except (OSError, KeyError, ValueError):
+            pass
+
+        master = cls.from_csv(path)
+        try:
+            master.save(cache_path)
+        except OSError:
+            pass
+        return master
+
+
+def _interned(strings):
+    out = np.empty(len(strings), dtype=object)
+    out[:] = [sys.intern(str(s)) for s in strings]
+    return out
+
+
+_MASTER = None
+
+
+def get_master(path=SYMBOLS_CSV):
+    """Process-wide SymbolMaster, reloaded only when the CSV changes."""
+    global _MASTER
+    if _MASTER is None or _MASTER.mtime != os.path.getmtime(path):
+        _MASTER = SymbolMaster.load(path)
+    return _MASTER
@@ -1,22 +1,63 @@
-import pandas as pd
+from config import INTERVAL
+from engine.candle_store import STORE
+from engine.symbol_master import get_master
 
 def load_symbols(price_min, price_max):
-    df = pd.read_csv("stocks.csv")
+    # LTP PREFILTER (VERY IMPORTANT) – O(log n) on the sorted LTP index
+    master = get_master()
+    return master.frame(master.price_range(price_min, price_max))
 
-    # Normalize columns
-    df.columns = (
-        df.columns.str.strip().str.upper().str.replace(" ", "_")
-    )
 
-    # LTP PREFILTER (VERY IMPORTANT)
-    df = df[
-        (df["LTP"] >= price_min) &
-        (df["LTP"] <= price_max)
+# =========================================================
+# PRICE-BAND PREFILTER (skip symbols no filter set can show)
+# =========================================================
+def price_bands(ranges, tolerance):
+    """[(min, max), ...] widened by a relative tolerance, as [[lo, hi], ...]."""
+    return [
+        [float(lo) * (1 - tolerance), float(hi) * (1 + tolerance)]
+        for lo, hi in ranges
     ]
 
-    return df[[
-        "SYMBOL",
-        "NAME_OF_COMPANY",
-        "SECURITY_ID",
-        "LTP"
-    ]]
+
+def bands_cover(outer, inner):
+    """True if a scan over `outer` bands (None = everything) contains `inner`."""
+    if outer is None:
+        return True
+    if inner is None:
+        return False
+    return all(
+        any(o_lo <= lo and hi <= o_hi for o_lo, o_hi in outer)
+        for lo, hi in inner
+    )
+
+
+def prefilter_by_price(df, bands, interval=INTERVAL):
+    """
+    Keep symbols whose CSV LTP or last scanned close lies in any band:
+    two searchsorted lookups per band on the symbol master's price
+    indexes. The scanned closes track the market (record_prices) while
+    the CSV LTP covers symbols never fetched.
+    """
+    if bands is None or df.empty:
+        return df
+
+    master = get_master()
+    if master.last_updated is None:
+        seed_prices(master, interval)
+
+    rows = master.rows(df["SECURITY_ID"])
+    keep = master.in_bands(bands)[rows] & (rows >= 0)
+    return df[keep]
+
+
+def seed_prices(master, interval=INTERVAL):
+    # Once per process (or CSV reload): last stored closes stand in for
+    # scanned prices until the first scan reports its own
+    sids = master.security_ids
+    master.update_last(sids, [STORE.last_close(str(sid), interval) for sid in sids])
+
+
+def record_prices(results):
+    """Latest scanned closes -> symbol master (read by prefilter_by_price)."""
+    if not results.empty:
+        get_master().update_last(results["security_id"], results["close"])
@@ -0,0 +1,320 @@
+"""
+Streaming ingestion: Dhan live market feed (WebSocket) -> in-memory
+candles per security_id -> incremental indicator state.
+
+    python -m engine.scanner --stream        # live feed; polling warms up and backfills gaps
+    python -m engine.mock_feed --port 8766   # local replay stand-in
+    DHAN_FEED_URL=ws://127.0.0.1:8766 python -m engine.scanner --stream
+
+Needs the optional `websockets` package (pip install websockets) and
+DHAN_CLIENT_ID next to DHAN_ACCESS_TOKEN; without them the scanner keeps
+polling. Closed bars go to the candle store like polled ones, so a
+backfill scan after a disconnect continues from exactly where the
+stream stopped.
+"""
+import asyncio
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import websockets
+except ImportError:  # optional: streaming mode only
+    websockets = None
+
+from config import (
+    DHAN_FEED_URL, FEED_INTERVAL, INTERVAL, SCAN_LOOKBACK_DAYS, STREAM_PUBLISH_SECONDS
+)
+from engine.candle_store import STORE, COLUMNS, to_epoch
+from engine.data_fetcher import window_start
+from engine.incremental import STATES
+from engine.metrics import METRICS
+from engine.resample import bar_open
+
+load_dotenv()
+
+FEED_URL = os.getenv("DHAN_FEED_URL", DHAN_FEED_URL)
+TOKEN = os.getenv("DHAN_ACCESS_TOKEN")
+CLIENT_ID = os.getenv("DHAN_CLIENT_ID")
+
+
+# =========================================================
+# DHAN FEED v2 WIRE FORMAT (little-endian binary packets)
+# =========================================================
+HEADER = struct.Struct("<BhBi")     # response code, message length, segment, security id
+TICKER = struct.Struct("<fi")       # LTP, LTT
+QUOTE = struct.Struct("<fhifi")     # LTP, LTQ, LTT, ATP, day volume
+
+TICKER_CODE = 2
+QUOTE_CODE = 4
+DISCONNECT_CODE = 50
+SUBSCRIBE_QUOTE = 17
+SUBSCRIBE_BATCH = 100               # instruments per subscribe message
+NSE_EQ = 1
+
+
+def subscribe_messages(security_ids):
+    ids = [str(s) for s in security_ids]
+    for i in range(0, len(ids), SUBSCRIBE_BATCH):
+        batch = ids[i:i + SUBSCRIBE_BATCH]
+        yield json.dumps({
+            "RequestCode": SUBSCRIBE_QUOTE,
+            "InstrumentCount": len(batch),
+            "InstrumentList": [
+                {"ExchangeSegment": "NSE_EQ", "SecurityId": sid} for sid in batch
+            ],
+        })
+
+
+def parse_packets(data):
+    """Yield (code, security_id, ltp, ltt, day_volume or None) per packet."""
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        code, length, _, sid = HEADER.unpack_from(data, offset)
+        body = offset + HEADER.size
+        payload = {TICKER_CODE: TICKER, QUOTE_CODE: QUOTE}.get(code)
+        if payload and body + payload.size > len(data):
+            break   # truncated packet: nothing after it can be trusted
+        if code == TICKER_CODE:
+            ltp, ltt = TICKER.unpack_from(data, body)
+            yield code, str(sid), ltp, ltt, None
+        elif code == QUOTE_CODE:
+            ltp, _, ltt, _, volume = QUOTE.unpack_from(data, body)
+            yield code, str(sid), ltp, ltt, volume
+        elif code == DISCONNECT_CODE:
+            yield code, str(sid), None, None, None
+        if length <= 0:
+            break
+        offset += length
+
+
+def encode_quote(security_id, ltp, ltt, day_volume):
+    """One quote packet (the replay stand-in speaks the same format)."""
+    length = HEADER.size + QUOTE.size
+    return HEADER.pack(QUOTE_CODE, length, NSE_EQ, int(security_id)) + \
+        QUOTE.pack(ltp, 0, int(ltt), ltp, int(day_volume))
+
+
+def tick_time(ltt, now):
+    # LTT may arrive as IST wall-clock seconds; trust the clock if it is far off
+    if ltt and abs(ltt - now) > 3 * 3600:
+        ltt -= 19800
+    return ltt if ltt and abs(ltt - now) <= 3 * 3600 else int(now)
+
+
+# =========================================================
+# CANDLE BUILDER
+# =========================================================
+class CandleBuilder:
+    """Forming bar per security_id, as [open_ts, o, h, l, c, v]."""
+
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self.bars = {}
+
+    def seed(self, security_id, bar):
+        ts, *ohlcv = bar
+        self.bars[security_id] = [int(ts), *map(float, ohlcv)]
+
+    def on_tick(self, security_id, ts, price, qty):
+        """Fold one trade in; returns the bar it closed, if any."""
+        opened = int(bar_open(ts, self.minutes))
+        bar = self.bars.get(security_id)
+
+        if bar is None or opened > bar[0]:
+            self.bars[security_id] = [opened, price, price, price, price, qty]
+            return bar
+        if opened == bar[0]:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += qty
+        # Late ticks for an already closed bar are dropped
+        return None
+
+
+class BarWriter:
+    """
+    Closed bars -> candle store from one daemon thread, so the websocket
+    loop never waits on disk. Bars that queue up during a write (every
+    symbol closes its bar on the same minute) are grouped and stored with
+    one append per (security_id, interval).
+    """
+
+    def __init__(self, store=STORE):
+        self.store = store
+        self.queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def put(self, security_id, interval, bar):
+        self.queue.put((security_id, interval, bar))
+
+    def flush(self):
+        """Block until every queued bar is stored (before a backfill scan)."""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            grouped = {}
+            for security_id, interval, bar in batch:
+                grouped.setdefault((security_id, interval), []).append(bar)
+
+            with METRICS.timer("store.stream"):
+                for (security_id, interval), bars in grouped.items():
+                    try:
+                        self.store.append(security_id, interval,
+                                          pd.DataFrame(bars, columns=COLUMNS))
+                    except Exception as e:
+                        print(f"[WARN] storing {security_id} bars failed → {e}")
+
+            for _ in batch:
+                self.queue.task_done()
+
+
+_WRITER = None
+
+
+def bar_writer():
+    # One writer thread per process, shared by every LiveFeed (reconnects)
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = BarWriter()
+    return _WRITER
+
+
+# =========================================================
+# LIVE FEED -> INDICATOR STATE -> RESULTS
+# =========================================================
+class LiveFeed:
+    """
+    Ticks -> FEED_INTERVAL bars (stored, so backfill and derived
+    timeframes carry on) and INTERVAL bars (closed ones committed to
+    STATES, the forming one evaluated with peek()). refresh() re-evaluates
+    only symbols that traded since the last call.
+    """
+
+    def __init__(self, results, interval=INTERVAL):
+        self.interval = interval
+        self.results = results.set_index("security_id", drop=False)
+        self.feed = CandleBuilder(FEED_INTERVAL)
+        self.bars = CandleBuilder(interval)
+        self.day_volume = {}
+        self.ltp = {}
+        self.dirty = set()
+        self.writer = bar_writer()
+
+    @property
+    def security_ids(self):
+        return list(self.results.index)
+
+    def warm(self):
+        """Seed indicator states and forming bars from the store (after a polling scan)."""
+        since = to_epoch(window_start(SCAN_LOOKBACK_DAYS))
+        for sid in self.security_ids:
+            candles = STORE.load(sid, self.interval, since=since)
+            if candles.empty or STATES.sync(sid, candles) is None:
+                continue
+            self.bars.seed(sid, candles.iloc[-1][COLUMNS].tolist())
+            if FEED_INTERVAL != self.interval:
+                fed = STORE.load(sid, FEED_INTERVAL, since=since)
+                if not fed.empty:
+                    self.feed.seed(sid, fed.iloc[-1][COLUMNS].tolist())
+        self.day_volume.clear()
+
+    def on_tick(self, security_id, ts, price, day_volume):
+        if security_id not in self.results.index or security_id not in STATES.states:
+            return
+
+        # Bar volume from the cumulative day volume (first tick only sets the base)
+        prev = self.day_volume.get(security_id)
+        qty = 0.0
+        if day_volume is not None:
+            self.day_volume[security_id] = day_volume
+            if prev is not None:
+                qty = max(float(day_volume - prev), 0.0)
+
+        if FEED_INTERVAL != self.interval:
+            closed = self.feed.on_tick(security_id, ts, price, qty)
+            if closed:
+                self.writer.put(security_id, FEED_INTERVAL, closed)
+
+        closed = self.bars.on_tick(security_id, ts, price, qty)
+        if closed:
+            STATES.states[security_id].update(*closed)
+            self.writer.put(security_id, self.interval, closed)
+
+        self.ltp[security_id] = price
+        self.dirty.add(security_id)
+
+    def refresh(self):
+        """Indicator values of the symbols touched since the last call -> results."""
+        if not self.dirty:
+            return 0
+
+        rows = {}
+        for sid in self.dirty:
+            snap = STATES.states[sid].peek(*self.bars.bars[sid])
+            snap["ltp"] = self.ltp[sid]
+            rows[sid] = snap
+        self.dirty = set()
+
+        update = pd.DataFrame.from_dict(rows, orient="index")
+        update = update[[c for c in update.columns if c in self.results.columns]]
+        self.results.update(update)
+        return len(rows)
+
+
+# =========================================================
+# WEBSOCKET LOOP
+# =========================================================
+def available():
+    return websockets is not None and bool(TOKEN) and bool(CLIENT_ID)
+
+
+async def stream(feed, on_publish, every=STREAM_PUBLISH_SECONDS):
+    """
+    Subscribe feed.security_ids and apply ticks until the connection
+    drops (raises ConnectionError / OSError); on_publish(results) runs
+    at most every `every` seconds when something changed.
+    """
+    url = f"{FEED_URL}?version=2&token={TOKEN}&clientId={CLIENT_ID}&authType=2"
+
+    async def publisher():
+        while True:
+            await asyncio.sleep(every)
+            with METRICS.timer("stream.refresh"):
+                changed = feed.refresh()
+            if changed:
+                on_publish(feed.results.reset_index(drop=True))
+
+    async with websockets.connect(url, max_size=None) as ws:
+        for message in subscribe_messages(feed.security_ids):
+            await ws.send(message)
+
+        task = asyncio.ensure_future(publisher())
+        try:
+            async for message in ws:
+                if not isinstance(message, bytes):
+                    continue
+                now = time.time()
+                with METRICS.timer("stream.message"):
+                    for code, sid, ltp, ltt, volume in parse_packets(message):
+                        if code == DISCONNECT_CODE:
+                            raise ConnectionError(f"feed disconnected (code {code})")
+                        feed.on_tick(sid, tick_time(ltt, now), ltp, volume)
+        finally:
+            task.cancel()
+    raise ConnectionError("feed closed")
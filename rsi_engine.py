@@ -1,27 +1,26 @@
+import numpy as np
 import pandas as pd
 
-def compute_rsi(close, period=14):
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+from config import RSI_BUCKETS
+# Single RSI implementation lives in engine/indicators.py
+from engine.indicators import compute_rsi, rsi_array  # noqa: F401
 
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
+_BUCKETS = sorted(RSI_BUCKETS, reverse=True)
+RSI_BUCKET_ORDER = [label for _, label in _BUCKETS]
+_BOUNDS = np.array([bound for bound, _ in reversed(_BUCKETS)], dtype=float)   # ascending
+
+
+def rsi_buckets(rsi):
+    """
+    RSI values -> Categorical over RSI_BUCKET_ORDER: one searchsorted
+    against the RSI_BUCKETS lower bounds. NaN / below every bound falls
+    in the lowest bucket.
+    """
+    rsi = np.asarray(rsi, dtype=float)
+    above = np.searchsorted(_BOUNDS, rsi, side="right") - 1   # last bound <= rsi
+    above = np.where(np.isnan(rsi), 0, np.maximum(above, 0))
+    return pd.Categorical.from_codes(len(_BOUNDS) - 1 - above, categories=RSI_BUCKET_ORDER)
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
 
 def rsi_bucket(rsi):
-    if rsi >= 80:
-        return "Extreme Bought"
-    elif rsi >= 70:
-        return "Overbought"
-    elif rsi >= 55:
-        return "Bullish"
-    elif rsi >= 45:
-        return "Bearish"
-    elif rsi >= 30:
-        return "Oversold"
-    else:
-        return "Extreme Sold"
+    return rsi_buckets([rsi])[0]
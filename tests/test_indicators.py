@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from engine import indicators
+from engine.indicators import RSI_MODES, rsi_array
+
+
+def gapped_closes(rows=20, bars=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, (rows, bars)), axis=1)
+    close[:, 100] = np.nan               # one-bar gap in every row
+    close[rows // 2, 200:206] = np.nan   # longer gap in one row
+    close[-1, :30] = np.nan              # late listing
+    return close
+
+
+def kernels():
+    yield "lists", indicators._rsi_lists
+    yield "numpy", indicators._rsi_numpy
+    if indicators.njit:
+        yield "numba", indicators._rsi_jit
+
+
+@pytest.mark.parametrize("mode", list(RSI_MODES))
+def test_rsi_kernels_agree_on_gaps(mode):
+    close = gapped_closes()
+    outputs = {}
+    for name, kernel in kernels():
+        out = np.empty(close.shape)
+        kernel(close, 14, RSI_MODES[mode], out)
+        outputs[name] = out
+
+    reference = outputs.pop("lists")
+    # No value on the gap itself or on the bar after it
+    assert np.isnan(reference[:, 100:102]).all()
+    for name, out in outputs.items():
+        np.testing.assert_allclose(out, reference, rtol=1e-9, equal_nan=True,
+                                   err_msg=f"{name} vs lists ({mode})")
+
+
+def test_rsi_sma_recovers_after_gap():
+    close = gapped_closes(rows=1)[0]
+    rsi = rsi_array(close, 14, "sma")
+    # Window refills with 14 clean deltas after the gap, then matches a fresh start
+    assert np.isnan(rsi[101:115]).all()
+    np.testing.assert_allclose(rsi[115:200], rsi_array(close[101:], 14, "sma")[14:99])
+
+
+@pytest.mark.parametrize("mode", ["wilder", "ema"])
+def test_rsi_last_matches_full_pass(mode):
+    close = gapped_closes(rows=1, bars=800)[0]
+    np.testing.assert_allclose(rsi_array(close, 14, mode, last=3),
+                               rsi_array(close, 14, mode)[-3:], atol=1e-5)